@@ -1,24 +1,66 @@
-from main import run_ai
-from classes.Stone import Stone
-from classes.color import Color
-from classes.board import Board
-from classes.mode import Mode
-import time
+import argparse
+import random
 import sys
+import time
 
-#sys.tracebacklimit = 0
+parser = argparse.ArgumentParser(
+    prog="python -m b.uugame_ai",
+    description="perft: counts the positions after all move sequences of the AI move generator, "
+    "with --bench searches the boards and prints the statistics of the search",
+)
+parser.add_argument("--board", default="board", type=str, help="board to start from, see BOARDS")
+parser.add_argument("--depth", default=3, type=int, help="number of moves of the sequences")
+parser.add_argument("--first", default="black", type=str, choices=["white", "black"], help="color to move")
+parser.add_argument("--divide", action="store_true", help="print the count after each first move")
+parser.add_argument(
+    "--check", action="store_true", help="compare all counts of KNOWN_COUNTS and the batch move generator"
+)
+parser.add_argument("--bench", action="store_true", help="search the benchmark positions to the depth instead")
+parser.add_argument("--no-reductions", action="store_true", help="search without late move reductions")
+parser.add_argument("--no-futility", action="store_true", help="search without futility pruning")
+parser.add_argument(
+    "--no-ordering",
+    action="store_true",
+    help="search the moves in the order of the move generator, "
+    "use it with --no-reductions and --no-futility, which depend on the order",
+)
+parser.add_argument(
+    "--mcts", action="store_true", help="with --bench run the Monte Carlo tree search and print the playouts"
+)
+parser.add_argument("--seconds", default=2.0, type=float, help="seconds of the Monte Carlo tree search per board")
+args = parser.parse_args()
+# importing uu_game parses the command line of the game, which doesn't know these arguments
+sys.argv = sys.argv[:1]
+
+from uu_game.vec2 import Vec2  # noqa: E402
+from .classes.board import Board  # noqa: E402
+from .classes.color import Color, COLOR_ID_TO_COLOR  # noqa: E402
+from .classes.drop_tables import get_drop_tables  # noqa: E402
+from .classes.position import Position  # noqa: E402
+from .classes.search_context import SearchContext  # noqa: E402
+from .classes.stone import Stone  # noqa: E402
+from .classes.transposition_table import TranspositionTable  # noqa: E402
+from .functions.batch_moves import batch_possible_moves, count_moves, moves_of  # noqa: E402
+from .functions.batch_scoring import encode_positions  # noqa: E402
+from .functions.check_win import has_road  # noqa: E402
+from .functions.mcts import mcts  # noqa: E402
+from .functions.minimax import find_best_move  # noqa: E402
+from .functions.perft import divide, perft, perft_positions  # noqa: E402
+from .functions.possible_moves import possible_moves  # noqa: E402
 
-if __name__ == "__main__":
-    board: Board = Board()
+
+def make_boards() -> dict[str, Board]:
+    """
+    The boards to start perft from
+    """
+    board = Board()
 
     board_2 = Board()
     board_2.get_cell(0, 0).append(Stone(Color.BLACK, False))
     board_2.get_cell(0, 0).append(Stone(Color.BLACK, False))
-    #board_2.get_cell(0, 1).append(Stone(Color.BLACK, False))
     board_2.get_cell(0, 2).append(Stone(Color.BLACK, False))
     board_2.get_cell(0, 3).append(Stone(Color.BLACK, False))
 
-
     board_3 = Board()
     board_3.get_cell(1, 0).append(Stone(Color.BLACK, False))
     board_3.get_cell(1, 1).append(Stone(Color.BLACK, False))
@@ -49,14 +91,191 @@ if __name__ == "__main__":
     board_6.get_cell(1, 1).append(Stone(Color.BLACK, False))
     board_6.get_cell(1, 1).append(Stone(Color.BLACK, True))
 
+    # the board size of the game
+    board_5x5 = Board(Vec2(5, 5))
+
+    return {
+        "board": board,
+        "board_2": board_2,
+        "board_3": board_3,
+        "board_4": board_4,
+        "board_5": board_5,
+        "board_6": board_6,
+        "board_5x5": board_5x5,
+    }
+
+
+BOARDS = make_boards()
+
+# perft counts of the move generator with black to move, (board, depth): count
+KNOWN_COUNTS: dict[tuple[str, int], int] = {
+    ("board", 4): 878496,
+    ("board_2", 4): 1071496,
+    ("board_3", 4): 193760,
+    ("board_4", 4): 930828,
+    ("board_5", 4): 31432,
+    ("board_6", 3): 188936,
+    ("board_5x5", 3): 117810,
+}
+
+# the batch move generator is checked on the positions of perft up to this depth
+BATCH_CHECK_DEPTH = 3
+
+# the search benchmark starts from the positions after BENCH_PLIES random moves on the 5x5 board,
+# one position per seed
+BENCH_SEEDS = range(6)
+BENCH_PLIES = 14
+
 
-    game_end = False
-    player_color = Color.BLACK
-    i = 0
-    while not game_end:
-        # print(f"Start Move Number {i}")
-        # print(f"It is{player_color}'s turn")
-        i += 1
-        #time.sleep(1)
-        game_end, board = run_ai(board, i, player_color, Mode.HARD)
-        player_color = Color.BLACK if player_color == Color.WHITE else Color.WHITE
+def make_bench_positions() -> list[tuple[Position, int]]:
+    """
+    The positions of the search benchmark, the same ones as long as the move generator does not change
+    :return: the positions and the color id of the player to move on each
+    """
+    positions = []
+    for seed in BENCH_SEEDS:
+        rng = random.Random(seed)
+        position = Position.from_board(BOARDS["board_5x5"])
+        color = COLOR_ID_TO_COLOR.index(Color.BLACK)
+        for _ in range(BENCH_PLIES):
+            move = rng.choice(possible_moves(position, color))
+            position.apply_move(move, color)
+            if has_road(position, color) or has_road(position, 1 - color):
+                # the game would be over, so the move is not played
+                position.undo_move(move, color)
+                break
+            color = 1 - color
+        positions.append((position, color))
+    return positions
+
+
+def run_perft(board_name: str, depth: int, player_color: int, show_divide: bool) -> int:
+    """
+    Runs perft on one of the boards and prints the count and the speed
+    :return: the count
+    """
+    position = Position.from_board(BOARDS[board_name])
+    start_time = time.perf_counter()
+    if show_divide:
+        counts = divide(position, player_color, depth)
+        for move, count in counts:
+            print(f"{move}: {count}")
+        nodes = sum(count for _, count in counts)
+    else:
+        nodes = perft(position, player_color, depth)
+    seconds = time.perf_counter() - start_time
+    print(f"{board_name} depth {depth}: {nodes} nodes in {seconds:.2f} s, {nodes / max(seconds, 1e-9):.0f} nodes/s")
+    return nodes
+
+
+def check_known_counts() -> bool:
+    """
+    Runs perft for all known counts
+    :return: True if all counts are equal to the known ones
+    """
+    failed = 0
+    for (board_name, depth), known in KNOWN_COUNTS.items():
+        nodes = run_perft(board_name, depth, COLOR_ID_TO_COLOR.index(Color.BLACK), False)
+        if nodes != known:
+            print(f"  expected {known}")
+            failed += 1
+    print(f"{len(KNOWN_COUNTS) - failed} of {len(KNOWN_COUNTS)} counts are right")
+    return not failed
+
+
+def check_batch_moves() -> bool:
+    """
+    Compares the moves of batch_possible_moves with possible_moves
+    on the positions of perft of all boards up to BATCH_CHECK_DEPTH
+    :return: True if the moves of all positions are the same
+    """
+    checked = 0
+    failed = 0
+    for board_name, board in BOARDS.items():
+        position = Position.from_board(board)
+        tables = get_drop_tables(board.size.x, board.size.y, position.carry_limit)
+        positions = perft_positions(position, COLOR_ID_TO_COLOR.index(Color.BLACK), BATCH_CHECK_DEPTH)
+        for player_color in (0, 1):
+            group = [position for position, color in positions if color == player_color]
+            if not group:
+                continue
+            boards, reserves = encode_positions(group)
+            placements, stack_moves = batch_possible_moves(boards, reserves, player_color, tables)
+            counts = count_moves(placements, stack_moves)
+            for index, position in enumerate(group):
+                moves = possible_moves(position, player_color)
+                if counts[index] != len(moves) or moves_of(placements[index], stack_moves[index], tables) != moves:
+                    failed += 1
+            checked += len(group)
+    print(f"{checked - failed} of {checked} positions have the same moves in the batch move generator")
+    return not failed
+
+
+def run_bench(depth: int, reductions: bool, futility: bool, ordering: bool):
+    """
+    Searches the positions of make_bench_positions to a fixed depth, each with an empty
+    transposition table, and prints the statistics the search leaves in its context,
+    so changes of the search can be compared by nodes
+    """
+    total_nodes = 0
+    total_seconds = 0.0
+    for seed, (position, player_color) in zip(BENCH_SEEDS, make_bench_positions()):
+        context = SearchContext(TranspositionTable(), reductions=reductions, futility=futility, ordering=ordering)
+        start_time = time.perf_counter()
+        score, move, _ = find_best_move(position, player_color, depth, float("inf"), float("inf"), context=context)
+        seconds = time.perf_counter() - start_time
+        total_nodes += context.nodes
+        total_seconds += seconds
+        print(
+            f"seed {seed} depth {depth}: score {score} {move}, {context.nodes} nodes in {seconds:.2f} s, "
+            f"quiescence {context.quiescence_nodes} nodes in {context.quiescence_searches} searches "
+            f"({context.quiescence_exhausted} out of budget), {context.reduced} reduced "
+            f"({context.reduction_researches} searched again), {context.futility_pruned} futility pruned, "
+            f"{context.table.hits} of {context.table.probes} table hits"
+        )
+    print(f"total: {total_nodes} nodes in {total_seconds:.2f} s, {total_nodes / max(total_seconds, 1e-9):.0f} nodes/s")
+
+
+def run_mcts_bench(seconds: float):
+    """
+    Builds a Monte Carlo tree for each position of make_bench_positions in this process
+    for the given seconds and prints the playouts, so changes of the playouts can be compared by speed
+    """
+    total_playouts = 0
+    total_seconds = 0.0
+    for seed, (position, player_color) in zip(BENCH_SEEDS, make_bench_positions()):
+        start_time = time.perf_counter()
+        root, playouts = mcts(position, player_color, time.time() + seconds, seed=seed)
+        elapsed = time.perf_counter() - start_time
+        total_playouts += playouts
+        total_seconds += elapsed
+        best = max(root.children, key=lambda child: child.visits, default=None)
+        if best is None:
+            best_text = "no move"
+        else:
+            best_text = f"{best.move} win rate {best.wins / best.visits:.2f}"
+        print(
+            f"seed {seed}: {best_text}, {playouts} playouts in {elapsed:.2f} s, "
+            f"{playouts / max(elapsed, 1e-9):.0f} playouts/s"
+        )
+    print(
+        f"total: {total_playouts} playouts in {total_seconds:.2f} s, "
+        f"{total_playouts / max(total_seconds, 1e-9):.0f} playouts/s"
+    )
+
+
+if __name__ == "__main__":
+    if args.bench and args.mcts:
+        run_mcts_bench(args.seconds)
+        sys.exit(0)
+    if args.bench:
+        run_bench(args.depth, not args.no_reductions, not args.no_futility, not args.no_ordering)
+        sys.exit(0)
+    if args.check:
+        counts_right = check_known_counts()
+        batch_moves_right = check_batch_moves()
+        sys.exit(0 if counts_right and batch_moves_right else 1)
+    if args.board not in BOARDS:
+        parser.error(f"unknown board {args.board}, choose from {', '.join(BOARDS)}")
+    color = Color.BLACK if args.first == "black" else Color.WHITE
+    run_perft(args.board, args.depth, COLOR_ID_TO_COLOR.index(color), args.divide)
@@ -7,6 +7,10 @@ class Color(Enum):
     WHITE = 2
 
 
+# the index is the color id used by uu_game.model and the search
+COLOR_ID_TO_COLOR = [Color.BLACK, Color.WHITE]
+
+
 def print_color(color: Color):
     if color == Color.BLACK:
         return "BLACK"
@@ -0,0 +1,86 @@
+from functools import lru_cache
+import numpy as np
+from .geometry import get_geometry
+from .move import Move
+
+
+def drop_sequences(count: int, length: int) -> list[tuple[int, ...]]:
+    """
+    All ways to drop a carried stack on at most length cells, at least one stone per cell,
+    in the order the moves are generated: first all stones on the next cell,
+    then one stone on it and the rest on the following cells, then two stones, and so on
+    :param count: the number of carried stones
+    :param length: the number of cells the stack can walk over
+    :return: the stones dropped on each cell
+    """
+    if length == 0:
+        return []
+    sequences = [(count,)]
+    for dropped in range(1, count):
+        sequences += [(dropped,) + rest for rest in drop_sequences(count - dropped, length - 1)]
+    return sequences
+
+
+class DropTables:
+    """
+    The stack moves of one board size and carry limit, computed once, see get_drop_tables.
+    A stack move of count stones from a cell in a direction is possible if the stack has
+    more than count stones and the cells it drops stones on have no standing stone on top,
+    so the moves only depend on how many stones can be picked up and how far the stack can walk.
+    :param size_x: width of the board
+    :param size_y: height of the board
+    :param carry_limit: the maximum number of stones that can be carried
+    """
+
+    def __init__(self, size_x: int, size_y: int, carry_limit: int):
+        geometry = get_geometry(size_x, size_y)
+        self.carry_limit = carry_limit
+        # sequences[count][reach]: the drops of count stones over at most reach cells
+        self.sequences = [
+            [drop_sequences(count, reach) for reach in range(count + 1)] for count in range(carry_limit + 1)
+        ]
+
+        # moves[cell][direction][count][reach]: the moves of count stones from the cell
+        # when the stack can walk over reach cells before a standing stone or the border
+        self.moves: list[list[list[list[tuple[Move, ...]]]]] = [
+            [
+                [
+                    [
+                        tuple(Move(cell, False, direction, drops) for drops in self.sequences[count][min(reach, count)])
+                        for reach in range(len(ray) + 1)
+                    ]
+                    for count in range(carry_limit + 1)
+                ]
+                for direction, ray in enumerate(rays)
+            ]
+            for cell, rays in enumerate(geometry.rays)
+        ]
+
+        # all stack moves of the board in the order possible_moves generates them:
+        # by cell, then by the number of stones, then by direction
+        self.stack_moves: list[Move] = [
+            move
+            for cell, rays in enumerate(geometry.rays)
+            for count in range(1, carry_limit + 1)
+            for direction, ray in enumerate(rays)
+            for move in self.moves[cell][direction][count][len(ray)]
+        ]
+        self.move_cells = np.array([move.cell for move in self.stack_moves], dtype=np.intp)
+        self.move_directions = np.array([move.direction for move in self.stack_moves], dtype=np.intp)
+        self.move_counts = np.array([sum(move.drops) for move in self.stack_moves], dtype=np.int64)
+        self.move_lengths = np.array([len(move.drops) for move in self.stack_moves], dtype=np.int64)
+
+        # the cells of each ray, padded with the index cell_count, which stands for the border
+        longest = max(size_x, size_y) - 1
+        self.ray_cells = np.full((geometry.cell_count, len(geometry.rays[0]), longest), geometry.cell_count, dtype=np.intp)
+        for cell, rays in enumerate(geometry.rays):
+            for direction, ray in enumerate(rays):
+                self.ray_cells[cell, direction, : len(ray)] = ray
+
+
+@lru_cache(maxsize=None)
+def get_drop_tables(size_x: int, size_y: int, carry_limit: int) -> DropTables:
+    """
+    The stack moves of a board size and carry limit, computed only once per size and limit
+    """
+    return DropTables(size_x, size_y, carry_limit)
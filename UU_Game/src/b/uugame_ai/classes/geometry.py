@@ -0,0 +1,156 @@
+from functools import lru_cache
+from operator import itemgetter
+from .move import DIRECTIONS
+
+
+class Geometry:
+    """
+    Tables of one board size which are shared by all AI modules, see get_geometry.
+    Cell (x, y) has the index x * size_y + y, like in Position, which is also its bit in the masks.
+    """
+
+    def __init__(self, size_x: int, size_y: int):
+        self.size_x = size_x
+        self.size_y = size_y
+        self.cell_count = size_x * size_y
+        self.coordinates = [(x, y) for x in range(size_x) for y in range(size_y)]
+
+        # coordinates and indices of the horizontal and vertical neighbors of each cell
+        self.adjacent: list[list[tuple[int, int]]] = []
+        for x, y in self.coordinates:
+            neighbors = []
+            if x > 0:
+                neighbors.append((x - 1, y))
+            if x < size_x - 1:
+                neighbors.append((x + 1, y))
+            if y > 0:
+                neighbors.append((x, y - 1))
+            if y < size_y - 1:
+                neighbors.append((x, y + 1))
+            self.adjacent.append(neighbors)
+        self.neighbors = [[x * size_y + y for x, y in cells] for cells in self.adjacent]
+        self.neighbor_masks = [sum(1 << index for index in cells) for cells in self.neighbors]
+
+        # the cells from a cell to the border in each of the DIRECTIONS, without the cell itself
+        self.rays: list[list[list[int]]] = []
+        for x, y in self.coordinates:
+            rays = []
+            for dx, dy in DIRECTIONS:
+                ray = []
+                ray_x, ray_y = x + dx, y + dy
+                while 0 <= ray_x < size_x and 0 <= ray_y < size_y:
+                    ray.append(ray_x * size_y + ray_y)
+                    ray_x, ray_y = ray_x + dx, ray_y + dy
+                rays.append(ray)
+            self.rays.append(rays)
+
+        # distance of each cell to the closest border
+        self.centrality = [
+            min(x, size_x - 1 - x) + min(y, size_y - 1 - y) for x, y in self.coordinates
+        ]
+        self.corners = [(x, y) for x in (0, size_x - 1) for y in (0, size_y - 1)]
+
+        # the reflections and rotations which map the board onto itself, the identity first,
+        # as the image of each cell and of each of the DIRECTIONS
+        transforms = [
+            lambda x, y: (x, y),
+            lambda x, y: (size_x - 1 - x, y),
+            lambda x, y: (x, size_y - 1 - y),
+            lambda x, y: (size_x - 1 - x, size_y - 1 - y),
+        ]
+        if size_x == size_y:
+            transforms += [
+                lambda x, y: (y, x),
+                lambda x, y: (size_y - 1 - y, size_x - 1 - x),
+                lambda x, y: (y, size_x - 1 - x),
+                lambda x, y: (size_y - 1 - y, x),
+            ]
+        self.cell_maps = [
+            [tx * size_y + ty for tx, ty in (transform(x, y) for x, y in self.coordinates)]
+            for transform in transforms
+        ]
+        self.direction_maps = []
+        for transform in transforms:
+            origin_x, origin_y = transform(0, 0)
+            images = [transform(dx, dy) for dx, dy in DIRECTIONS]
+            self.direction_maps.append(
+                [DIRECTIONS.index((x - origin_x, y - origin_y)) for x, y in images]
+            )
+        self.inverse_transforms = [
+            next(
+                inverse
+                for inverse, inverse_map in enumerate(self.cell_maps)
+                if all(inverse_map[image] == cell for cell, image in enumerate(cell_map))
+            )
+            for cell_map in self.cell_maps
+        ]
+        # pick the cells of a transformed board from the cells of the board
+        self.transform_cells = [
+            itemgetter(*self.cell_maps[inverse]) for inverse in self.inverse_transforms
+        ]
+
+        # bitmasks of all cells, of the first and last column (x) and of the first and last row (y)
+        self.full = (1 << self.cell_count) - 1
+        self.first_column = (1 << size_y) - 1
+        self.last_column = self.first_column << ((size_x - 1) * size_y)
+        self.first_row = 0
+        for x in range(size_x):
+            self.first_row |= 1 << (x * size_y)
+        self.last_row = self.first_row << (size_y - 1)
+        # the pairs of opposite sides a road connects, the x sides first
+        self.road_sides = (
+            (self.first_column, self.last_column),
+            (self.first_row, self.last_row),
+        )
+        # shifting by one row must not wrap into the neighboring column
+        self.not_first_row = self.full & ~self.first_row
+        self.not_last_row = self.full & ~self.last_row
+
+    def spread(self, cells: int) -> int:
+        """
+        Adds all cells adjacent to the given cells
+        :param cells: bitmask of cells
+        :return: bitmask of the cells and their neighbors
+        """
+        return (
+            cells
+            | (cells << self.size_y)
+            | (cells >> self.size_y)
+            | ((cells << 1) & self.not_first_row)
+            | ((cells >> 1) & self.not_last_row)
+        ) & self.full
+
+    def flood(self, cells: int, area: int) -> int:
+        """
+        Finds all cells of an area connected to some start cells
+        :param cells: bitmask of the start cells
+        :param area: bitmask of the cells which can be reached
+        :return: bitmask of the reached cells
+        """
+        reached = cells & area
+        while True:
+            grown = self.spread(reached) & area
+            if grown == reached:
+                return reached
+            reached = grown
+
+    def connects_sides(self, road: int) -> bool:
+        """
+        Checks if some cells connect two opposite sides of the board
+        :param road: bitmask of the cells
+        :return: True if the cells contain a road
+        """
+        for start_side, end_side in self.road_sides:
+            # without cells on both sides there can't be a road
+            if road & start_side and road & end_side:
+                if self.flood(start_side, road) & end_side:
+                    return True
+        return False
+
+
+@lru_cache(maxsize=None)
+def get_geometry(size_x: int, size_y: int) -> Geometry:
+    """
+    The tables of a board size, computed only once per size
+    """
+    return Geometry(size_x, size_y)
@@ -0,0 +1,70 @@
+import math
+from typing import Optional
+from .move import Move
+
+
+class MctsNode:
+    """
+    Node of the tree of a Monte Carlo tree search.
+    The results are counted for the player who made the move into the node,
+    a win counts 1, a draw 0.5 and a loss 0.
+    :param move: the move from the parent to this node, None for the root
+    :param parent: the node before the move, None for the root
+    :param color: color id of the player who made the move
+    :param untried_moves: the moves of the position which have no node yet, the move tried next last,
+                          empty if the game is over in the position
+    :param result: the result for color if the game is over in the position, otherwise None
+    """
+
+    def __init__(
+        self,
+        move: Optional[Move],
+        parent: Optional["MctsNode"],
+        color: int,
+        untried_moves: list[Move],
+        result: Optional[float] = None,
+    ):
+        self.move = move
+        self.parent = parent
+        self.color = color
+        self.untried_moves = untried_moves
+        self.result = result
+        self.children: list[MctsNode] = []
+        self.visits = 0
+        self.wins = 0.0
+
+    def select_child(self, exploration: float) -> "MctsNode":
+        """
+        Picks the child with the highest upper confidence bound (UCT)
+        :param exploration: weight of the visits against the win rate
+        :return: the child to search next
+        """
+        log_visits = math.log(self.visits)
+        return max(
+            self.children,
+            key=lambda child: child.wins / child.visits
+            + exploration * math.sqrt(log_visits / child.visits),
+        )
+
+    def add_child(
+        self, move: Move, color: int, untried_moves: list[Move], result: Optional[float] = None
+    ) -> "MctsNode":
+        """
+        Creates the node of a move taken from the untried moves
+        :return: the new child
+        """
+        child = MctsNode(move, self, color, untried_moves, result)
+        self.children.append(child)
+        return child
+
+    def update(self, result: float):
+        """
+        Counts the result of a playout in this node and all nodes above it
+        :param result: the result for the color of this node
+        """
+        node = self
+        while node is not None:
+            node.visits += 1
+            node.wins += result
+            result = 1 - result
+            node = node.parent
@@ -5,6 +5,10 @@ class Mode(Enum):
     EASY = 0
     MEDIUM = 1
     HARD = 2
+    # hard with all workers searching the same position and sharing one table
+    HARD_SMP = 3
+    # Monte Carlo tree search with playouts in all workers
+    MCTS = 4
 
 
 def print_color(mode: Mode):
@@ -14,5 +18,9 @@ def print_color(mode: Mode):
         return "MEDIUM"
     elif mode == Mode.HARD:
         return "HARD"
+    elif mode == Mode.HARD_SMP:
+        return "HARD_SMP"
+    elif mode == Mode.MCTS:
+        return "MCTS"
     else:
         return None
@@ -0,0 +1,66 @@
+from functools import lru_cache
+from typing import NamedTuple, Optional
+
+# same order as uu_game.vec2.CARDINAL_DIRECTIONS
+DIRECTIONS = [(1, 0), (0, 1), (-1, 0), (0, -1)]
+
+
+class Move(NamedTuple):
+    """
+    A move of a player, applied to a Position with Position.apply_move.
+    A placement puts a stone from the box on cell.
+    A stack move picks up sum(drops) stones from cell and walks in the
+    direction (index into DIRECTIONS), dropping drops[i] stones on the i-th cell.
+    """
+
+    cell: int
+    is_standing: bool = False
+    direction: int = -1
+    drops: tuple[int, ...] = ()
+
+    def __str__(self):
+        if not self.drops:
+            return f"Move(place {'S' if self.is_standing else 'F'} on {self.cell})"
+        return f"Move(stack from {self.cell} to {DIRECTIONS[self.direction]} drops {self.drops})"
+
+
+# Layout of an encoded move, from the lowest bits upwards:
+# a bit which is always set, so that 0 means no move, the cell, the is_standing flag,
+# the direction and then the number of stones of each drop
+DROP_BITS = 4
+
+
+def encode_move(move: Optional[Move]) -> int:
+    """
+    Packs a move into an integer, e.g. for storing it in a table
+    :param move: the move to pack or None
+    :return: the packed move, 0 for None
+    """
+    if move is None:
+        return 0
+    code = 0
+    for count in reversed(move.drops):
+        code = (code << DROP_BITS) | count
+    return (((((code << 2) | max(move.direction, 0)) << 1 | move.is_standing) << 8) | move.cell) << 1 | 1
+
+
+@lru_cache(maxsize=None)
+def decode_move(code: int) -> Optional[Move]:
+    """
+    Unpacks a move packed with encode_move
+    :param code: the packed move
+    :return: the move or None for 0
+    """
+    if code == 0:
+        return None
+    cell = (code >> 1) & 255
+    is_standing = bool((code >> 9) & 1)
+    direction = (code >> 10) & 3
+    code >>= 12
+    if code == 0:
+        return Move(cell, is_standing)
+    drops = []
+    while code:
+        drops.append(code & ((1 << DROP_BITS) - 1))
+        code >>= DROP_BITS
+    return Move(cell, is_standing, direction, tuple(drops))
@@ -0,0 +1,408 @@
+import random
+from uu_game.vec2 import Vec2
+from .board import Board
+from .color import COLOR_ID_TO_COLOR
+from .geometry import Geometry, get_geometry
+from .move import Move, DIRECTIONS
+from ..functions.remaining_stones import remaining_stones
+
+# color ids used by the search, the same ids as in uu_game.model
+BLACK = 0
+WHITE = 1
+
+# A stack of stones is packed into a single integer:
+# * the lowest bits hold the height of the stack
+# * one bit is set if the top stone is standing
+# * above that one bit per stone holds its color (1 for white), from the bottom upwards
+# Only the top stone of a stack can be standing, so one flag is enough.
+HEIGHT_BITS = 6
+HEIGHT_MASK = (1 << HEIGHT_BITS) - 1
+STANDING_BIT = 1 << HEIGHT_BITS
+COLOR_SHIFT = HEIGHT_BITS + 1
+
+
+# Zobrist keys: one random 64 bit number per cell, layer and kind of stone
+# (color id * 2 + is_standing), at index ((cell * ZOBRIST_LAYERS) + layer) * 4 + kind.
+# The numbers come from a fixed seed so every process computes the same keys.
+ZOBRIST_LAYERS = HEIGHT_MASK + 1
+ZOBRIST_SEED = 0x5EED
+_zobrist_random = random.Random(ZOBRIST_SEED)
+_zobrist_keys: list[int] = []
+
+# xored into the key of a position when white is to move
+SIDE_KEY = _zobrist_random.getrandbits(64)
+
+
+def zobrist_keys(cell_count: int) -> list[int]:
+    """
+    The zobrist keys for a board with the given number of cells.
+    Smaller boards share the keys of their cells with larger ones.
+    """
+    while len(_zobrist_keys) < cell_count * ZOBRIST_LAYERS * 4:
+        _zobrist_keys.append(_zobrist_random.getrandbits(64))
+    return _zobrist_keys
+
+
+def make_stone(color: int, is_standing: bool) -> int:
+    """
+    Packs a single stone into a stack
+    :param color: the color id of the stone
+    :param is_standing: True if the stone is standing
+    :return: the packed stack holding only this stone
+    """
+    return (color << COLOR_SHIFT) | (STANDING_BIT if is_standing else 0) | 1
+
+
+def top_color(stack: int) -> int:
+    """
+    Color id of the top stone of a non empty packed stack
+    """
+    return (stack >> (COLOR_SHIFT + (stack & HEIGHT_MASK) - 1)) & 1
+
+
+def join_stacks(lower: int, upper: int) -> int:
+    """
+    Puts the packed stack upper on top of the packed stack lower
+    :return: the combined packed stack
+    """
+    upper_height = upper & HEIGHT_MASK
+    if upper_height == 0:
+        return lower
+    lower_height = lower & HEIGHT_MASK
+    colors = ((lower >> COLOR_SHIFT) & ((1 << lower_height) - 1)) | (
+        (upper >> COLOR_SHIFT) << lower_height
+    )
+    return (colors << COLOR_SHIFT) | (upper & STANDING_BIT) | (lower_height + upper_height)
+
+
+def split_stack(stack: int, count: int) -> tuple[int, int]:
+    """
+    Splits the top count stones off a packed stack
+    :param stack: the packed stack
+    :param count: number of stones taken from the top
+    :return: the remaining lower stack and the taken upper stack
+    """
+    if count == 0:
+        return stack, 0
+    lower_height = (stack & HEIGHT_MASK) - count
+    colors = stack >> COLOR_SHIFT
+    lower = ((colors & ((1 << lower_height) - 1)) << COLOR_SHIFT) | lower_height
+    upper = ((colors >> lower_height) << COLOR_SHIFT) | (stack & STANDING_BIT) | count
+    return lower, upper
+
+
+# Counters of the evaluation features of the stacks, kept per color at index color id * 3 + feature:
+# stones lying directly on a flat stone of their own color,
+# standing stones on top of a stone of their own color and on top of a stone of the other color
+STACKED = 0
+STANDING_ON_OWN = 1
+STANDING_ON_OTHER = 2
+_stack_features: dict[int, tuple[int, ...]] = {}
+
+
+def stack_features(stack: int) -> tuple[int, ...]:
+    """
+    Counts the evaluation features of a packed stack, see STACKED
+    :return: the counters of both colors, indexed by color id * 3 + feature
+    """
+    features = _stack_features.get(stack)
+    if features is not None:
+        return features
+    height = stack & HEIGHT_MASK
+    counters = [0] * 6
+    for color in (BLACK, WHITE):
+        # color bits of the stones, set where the stone has this color
+        own = stack >> COLOR_SHIFT
+        if color == BLACK:
+            own = ~own
+        own &= (1 << height) - 1
+        stacked = (own & (own >> 1)).bit_count()
+        if stack & STANDING_BIT and height > 1 and (own >> (height - 1)) & 1:
+            # the standing stone is not flat, so it is not counted as stacked
+            if (own >> (height - 2)) & 1:
+                stacked -= 1
+                counters[color * 3 + STANDING_ON_OWN] = 1
+            else:
+                counters[color * 3 + STANDING_ON_OTHER] = 1
+        counters[color * 3 + STACKED] = stacked
+    features = tuple(counters)
+    _stack_features[stack] = features
+    return features
+
+
+def unpack_stack(stack: int) -> list[tuple[int, bool]]:
+    """
+    Unpacks a stack into a list of (color id, is_standing) from the bottom to the top
+    """
+    height = stack & HEIGHT_MASK
+    stones = [((stack >> (COLOR_SHIFT + z)) & 1, False) for z in range(height)]
+    if height and stack & STANDING_BIT:
+        stones[-1] = (stones[-1][0], True)
+    return stones
+
+
+class Position:
+    """
+    Compact board state for the AI.
+    Each cell holds a packed stack (see make_stone) and the cells with a
+    flat or standing top stone are kept as bitmasks per color.
+    Cell (x, y) has the index x * size.y + y, which is also its bit in the masks.
+    key is the zobrist key of the stones, updated with every change of a stack.
+    features holds the counters of stack_features summed over all cells,
+    also updated with every change, so the evaluation does not need to look at the stacks.
+    """
+
+    def __init__(self, size: Vec2 = Vec2(4, 4), carry_limit: int = 5):
+        self.size = size
+        self.carry_limit = carry_limit
+        self.geometry: Geometry = get_geometry(size.x, size.y)
+        self.cells: list[int] = [0] * (size.x * size.y)
+        # index offset of one step in each of the DIRECTIONS
+        self.steps = [dx * size.y + dy for dx, dy in DIRECTIONS]
+        # bitmasks of cells with a flat/standing stone on top, indexed by color id
+        self.flats = [0, 0]
+        self.walls = [0, 0]
+        # stones left in the box of each player, indexed by color id * 2 + is_standing
+        self.reserves = [16, 5, 16, 5]
+        self.zobrist = zobrist_keys(len(self.cells))
+        self.key = 0
+        self.features = [0] * 6
+
+    @classmethod
+    def from_board(cls, board: Board, carry_limit: int = 5) -> "Position":
+        """
+        Converts the list based board into a position
+        :param board: the board to convert
+        :param carry_limit: the maximum number of stones that can be carried
+        :return: the position
+        """
+        position = cls(board.size, carry_limit)
+        for x in range(board.size.x):
+            for y in range(board.size.y):
+                for stone in board.get_cell(x, y):
+                    position.push(
+                        position.index(x, y),
+                        COLOR_ID_TO_COLOR.index(stone.color),
+                        stone.is_standing,
+                    )
+        for (color, is_standing), count in remaining_stones(board).items():
+            position.reserves[COLOR_ID_TO_COLOR.index(color) * 2 + is_standing] = count
+        return position
+
+    def index(self, x: int, y: int) -> int:
+        return x * self.size.y + y
+
+    def coordinates(self, index: int) -> tuple[int, int]:
+        return self.geometry.coordinates[index]
+
+    def get_cell(self, x: int, y: int) -> int:
+        return self.cells[x * self.size.y + y]
+
+    def height(self, index: int) -> int:
+        return self.cells[index] & HEIGHT_MASK
+
+    def get_stack(self, index: int) -> list[tuple[int, bool]]:
+        return unpack_stack(self.cells[index])
+
+    def stack_key(self, index: int, stack: int, start: int = 0) -> int:
+        """
+        The zobrist key of the stones of a packed stack on a cell
+        :param index: the index of the cell
+        :param stack: the packed stack
+        :param start: the lowest layer which is included
+        :return: the xor of the keys of all stones from layer start upwards
+        """
+        height = stack & HEIGHT_MASK
+        key = 0
+        for layer in range(start, height):
+            kind = ((stack >> (COLOR_SHIFT + layer)) & 1) * 2
+            if layer == height - 1 and stack & STANDING_BIT:
+                kind += 1
+            key ^= self.zobrist[(index * ZOBRIST_LAYERS + layer) * 4 + kind]
+        return key
+
+    def set_cell(self, index: int, stack: int):
+        """
+        Replaces the stack on a cell and updates the top stone masks and the key
+        """
+        old = self.cells[index]
+
+        # only the stones above the layers both stacks have in common change the key
+        common = min(old & HEIGHT_MASK, stack & HEIGHT_MASK)
+        changed = ((old ^ stack) >> COLOR_SHIFT) & ((1 << common) - 1)
+        if changed:
+            common = (changed & -changed).bit_length() - 1
+        elif common and (old | stack) & STANDING_BIT:
+            common -= 1
+        self.key ^= self.stack_key(index, old, common) ^ self.stack_key(index, stack, common)
+
+        features = self.features
+        for i, (old_count, count) in enumerate(zip(stack_features(old), stack_features(stack))):
+            features[i] += count - old_count
+
+        bit = 1 << index
+        if old & HEIGHT_MASK:
+            if old & STANDING_BIT:
+                self.walls[top_color(old)] &= ~bit
+            else:
+                self.flats[top_color(old)] &= ~bit
+        self.cells[index] = stack
+        if stack & HEIGHT_MASK:
+            if stack & STANDING_BIT:
+                self.walls[top_color(stack)] |= bit
+            else:
+                self.flats[top_color(stack)] |= bit
+
+    def can_place(self, index: int) -> bool:
+        return not (self.cells[index] & STANDING_BIT)
+
+    def push(self, index: int, color: int, is_standing: bool):
+        """
+        Puts a stone on a cell without taking it from a box
+        """
+        self.set_cell(index, join_stacks(self.cells[index], make_stone(color, is_standing)))
+
+    def place(self, index: int, color: int, is_standing: bool):
+        """
+        Places a stone from the box of the given color on a cell
+        """
+        self.push(index, color, is_standing)
+        self.reserves[color * 2 + is_standing] -= 1
+
+    def apply_move(self, move: Move, color: int):
+        """
+        Plays a move of the given color on this position
+        :param move: a legal move for this position
+        :param color: the color id of the player making the move
+        """
+        if not move.drops:
+            # put the stone on top without unpacking the stack
+            index = move.cell
+            stack = self.cells[index]
+            height = stack & HEIGHT_MASK
+            bit = 1 << index
+            if height:
+                below = (stack >> (COLOR_SHIFT + height - 1)) & 1
+                self.flats[below] &= ~bit
+                if move.is_standing:
+                    self.features[color * 3 + (STANDING_ON_OWN if below == color else STANDING_ON_OTHER)] += 1
+                elif below == color:
+                    self.features[color * 3 + STACKED] += 1
+            if move.is_standing:
+                self.cells[index] = (stack | STANDING_BIT | (color << (COLOR_SHIFT + height))) + 1
+                self.walls[color] |= bit
+                self.reserves[color * 2 + 1] -= 1
+            else:
+                self.cells[index] = (stack | (color << (COLOR_SHIFT + height))) + 1
+                self.flats[color] |= bit
+                self.reserves[color * 2] -= 1
+            self.key ^= self.zobrist[
+                (index * ZOBRIST_LAYERS + height) * 4 + color * 2 + move.is_standing
+            ]
+            return
+
+        step = self.steps[move.direction]
+        index = move.cell
+        lower_stack, carried = split_stack(self.cells[index], sum(move.drops))
+        self.set_cell(index, lower_stack)
+        for count in move.drops:
+            index += step
+            dropped, carried = split_stack(carried, (carried & HEIGHT_MASK) - count)
+            self.set_cell(index, join_stacks(self.cells[index], dropped))
+
+    def undo_move(self, move: Move, color: int):
+        """
+        Takes back a move which was the last one applied with apply_move
+        :param move: the move to take back
+        :param color: the color id of the player who made the move
+        """
+        if not move.drops:
+            # take the stone from the top, the stone below can only be flat
+            index = move.cell
+            height = (self.cells[index] & HEIGHT_MASK) - 1
+            stack = self.cells[index] & ((1 << (COLOR_SHIFT + height)) - 1 - HEIGHT_MASK - STANDING_BIT)
+            bit = 1 << index
+            self.cells[index] = stack | height
+            if move.is_standing:
+                self.walls[color] &= ~bit
+                self.reserves[color * 2 + 1] += 1
+            else:
+                self.flats[color] &= ~bit
+                self.reserves[color * 2] += 1
+            if height:
+                below = (stack >> (COLOR_SHIFT + height - 1)) & 1
+                self.flats[below] |= bit
+                if move.is_standing:
+                    self.features[color * 3 + (STANDING_ON_OWN if below == color else STANDING_ON_OTHER)] -= 1
+                elif below == color:
+                    self.features[color * 3 + STACKED] -= 1
+            self.key ^= self.zobrist[
+                (index * ZOBRIST_LAYERS + height) * 4 + color * 2 + move.is_standing
+            ]
+            return
+
+        step = self.steps[move.direction]
+        index = move.cell + step * len(move.drops)
+        carried = 0
+        for count in reversed(move.drops):
+            lower_stack, dropped = split_stack(self.cells[index], count)
+            self.set_cell(index, lower_stack)
+            carried = join_stacks(dropped, carried)
+            index -= step
+        self.set_cell(index, join_stacks(self.cells[index], carried))
+
+    def copy(self) -> "Position":
+        position = Position.__new__(Position)
+        position.size = self.size
+        position.carry_limit = self.carry_limit
+        position.geometry = self.geometry
+        position.steps = self.steps
+        position.cells = self.cells.copy()
+        position.flats = self.flats.copy()
+        position.walls = self.walls.copy()
+        position.reserves = self.reserves.copy()
+        position.zobrist = self.zobrist
+        position.key = self.key
+        position.features = self.features.copy()
+        return position
+
+    def canonical_key(self) -> tuple[int, ...]:
+        """
+        Exact key of the stones and the boxes: two positions have the same key if and only if
+        they are equal, unlike the zobrist key which can collide
+        """
+        return (*self.cells, *self.reserves)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Position):
+            return NotImplemented
+        return self.size == other.size and self.canonical_key() == other.canonical_key()
+
+    def __hash__(self) -> int:
+        # equal positions have equal stones, so they have the same zobrist key
+        return self.key
+
+    def __getstate__(self):
+        # the zobrist keys and the tables of the board size are the same in every process,
+        # so they are not pickled
+        state = self.__dict__.copy()
+        del state["zobrist"]
+        del state["geometry"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.zobrist = zobrist_keys(len(self.cells))
+        self.geometry = get_geometry(self.size.x, self.size.y)
+
+    def __str__(self):
+        res = ""
+        for x in range(self.size.x):
+            res += "|"
+            for y in range(self.size.y):
+                res += "  " + str(self.get_stack(self.index(x, y))) + "  "
+            res += "\n"
+        return res
+
+    def __repr__(self):
+        return self.__str__()
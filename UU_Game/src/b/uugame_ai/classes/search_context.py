@@ -0,0 +1,99 @@
+import time
+from typing import Callable, Optional
+from .move import Move
+from .transposition_table import TranspositionTable
+
+
+class SearchTimeout(Exception):
+    """
+    Raised inside the search when the hard deadline of the move is reached
+    """
+
+
+class SearchContext:
+    """
+    State shared by all nodes of one search.
+    :param table: transposition table for results of already searched positions
+    :param deadline: time.time() at which the search is stopped, None for no limit
+    :param stop: returns True when another process wants the search to stop
+    :param quiescence_budget: most nodes the quiescence search of one leaf may visit
+    :param reductions: search late quiet moves with less depth (late move reductions)
+    :param futility: skip late quiet moves in positions far below alpha near the leaves
+    :param ordering: search the hash move, road threats, killers and the moves by history first,
+                     otherwise the moves are searched in the order of the move generator
+    """
+
+    # number of nodes between two looks at the clock
+    CLOCK_INTERVAL = 64
+    QUIESCENCE_BUDGET = 64
+
+    def __init__(
+        self,
+        table: Optional[TranspositionTable] = None,
+        deadline: Optional[float] = None,
+        stop: Optional[Callable[[], bool]] = None,
+        quiescence_budget: int = QUIESCENCE_BUDGET,
+        reductions: bool = True,
+        futility: bool = True,
+        ordering: bool = True,
+    ):
+        self.table = table
+        self.deadline = deadline
+        self.stop = stop
+        self.nodes = 0
+        # statistics of the quiescence search: leaves it was started at, nodes it visited
+        # (also counted in nodes) and leaves at which it ran out of its budget
+        self.quiescence_budget = quiescence_budget
+        self.quiescence_searches = 0
+        self.quiescence_nodes = 0
+        self.quiescence_exhausted = 0
+        # quiescence_nodes at which the quiescence search of the current leaf stops
+        self.quiescence_limit = 0
+        # switches and statistics of the selective search: moves searched with reduced depth,
+        # of them the ones searched again with full depth, and moves skipped by futility pruning
+        self.reductions = reductions
+        self.futility = futility
+        self.reduced = 0
+        self.reduction_researches = 0
+        self.futility_pruned = 0
+        # switch of the move ordering
+        self.ordering = ordering
+        # two moves per ply which caused a cutoff, tried early in sibling positions
+        self.killers: list[list[Optional[Move]]] = []
+        # how often each move of a color caused a cutoff, weighted by the remaining depth
+        self.history: list[dict[Move, int]] = [{}, {}]
+
+    def visit(self):
+        """
+        Counts a node and stops the search if the deadline has passed or it was told to stop
+        """
+        self.nodes += 1
+        if self.nodes % self.CLOCK_INTERVAL == 0 and (
+            (self.deadline is not None and time.time() > self.deadline)
+            or (self.stop is not None and self.stop())
+        ):
+            raise SearchTimeout()
+
+    def get_killers(self, ply: int) -> list[Optional[Move]]:
+        """
+        :param ply: distance to the root of the search
+        :return: the killer moves of the ply
+        """
+        while len(self.killers) <= ply:
+            self.killers.append([None, None])
+        return self.killers[ply]
+
+    def add_cutoff(self, move: Move, color: int, depth: int, ply: int):
+        """
+        Remembers a move which caused a cutoff for the move ordering
+        :param move: the move
+        :param color: color id of the player who made the move
+        :param depth: remaining search depth of the position
+        :param ply: distance of the position to the root of the search
+        """
+        killers = self.get_killers(ply)
+        if killers[0] != move:
+            killers[1] = killers[0]
+            killers[0] = move
+        history = self.history[color]
+        history[move] = history.get(move, 0) + depth * depth
@@ -0,0 +1,140 @@
+from multiprocessing.shared_memory import SharedMemory
+from typing import Optional
+from .move import Move, encode_move, decode_move
+from .transposition_table import (
+    DEPTH_SHIFT,
+    DEPTH_MASK,
+    GENERATION_SHIFT,
+    GENERATION_MASK,
+    SCORE_OFFSET,
+    SCORE_SHIFT,
+)
+
+# Layout of the shared memory in 64 bit words:
+# a header with the generation of the search and the stop flag, then the entries.
+# An entry has three words: the key xor the other two words, the packed data and the
+# encoded best move. The data is packed like in TranspositionTable without the move,
+# which has a word of its own, so it holds moves of up to (64 - 12) / DROP_BITS drops.
+GENERATION_WORD = 0
+STOP_WORD = 1
+HEADER_WORDS = 2
+ENTRY_WORDS = 3
+
+
+class SharedTranspositionTable:
+    """
+    Transposition table in shared memory, used by all worker processes of a search at once.
+    It has the same buckets and replacement as TranspositionTable.
+    The entries are written without locks: the key is stored xor the rest of the entry,
+    so an entry which was torn by two processes writing at the same time
+    does not match any key and is just a miss.
+    :param size_bits: the table has 2 << size_bits entries
+    :param name: name of the shared memory to attach to, a new one is created if None
+    """
+
+    def __init__(self, size_bits: int = 16, name: Optional[str] = None):
+        self.size_bits = size_bits
+        self.mask = (1 << size_bits) - 1
+        size = (HEADER_WORDS + ENTRY_WORDS * (2 << size_bits)) * 8
+        if name is None:
+            self.memory = SharedMemory(create=True, size=size)
+            self.memory.buf[:size] = bytes(size)
+        else:
+            self.memory = SharedMemory(name=name)
+        self.name = self.memory.name
+        self.words = self.memory.buf.cast("Q")
+        self.probes = 0
+        self.hits = 0
+
+    @property
+    def generation(self) -> int:
+        return self.words[GENERATION_WORD]
+
+    def new_search(self):
+        """
+        Marks the entries stored so far as old and clears the stop flag
+        """
+        self.words[GENERATION_WORD] = (self.words[GENERATION_WORD] + 1) & GENERATION_MASK
+        self.words[STOP_WORD] = 0
+
+    def stop(self):
+        """
+        Tells all processes searching with this table to stop
+        """
+        self.words[STOP_WORD] = 1
+
+    def is_stopped(self) -> bool:
+        return self.words[STOP_WORD] != 0
+
+    def clear(self):
+        words = self.words
+        for i in range(HEADER_WORDS, len(words)):
+            words[i] = 0
+
+    def probe(self, key: int) -> Optional[tuple[int, int, int, Optional[Move]]]:
+        """
+        Looks up a position
+        :param key: the zobrist key of the position
+        :return: depth, bound type, score and best move of the entry or None
+        """
+        self.probes += 1
+        words = self.words
+        index = HEADER_WORDS + ((key & self.mask) << 1) * ENTRY_WORDS
+        data = words[index + 1]
+        move = words[index + 2]
+        if words[index] ^ data ^ move != key:
+            index += ENTRY_WORDS
+            data = words[index + 1]
+            move = words[index + 2]
+            if words[index] ^ data ^ move != key:
+                return None
+        self.hits += 1
+        return (
+            (data >> DEPTH_SHIFT) & DEPTH_MASK,
+            data & 3,
+            (data >> SCORE_SHIFT) - SCORE_OFFSET,
+            decode_move(move),
+        )
+
+    def store(self, key: int, depth: int, bound: int, score: int, move: Optional[Move]):
+        """
+        Stores the result of a search
+        :param key: the zobrist key of the position
+        :param depth: the depth the position was searched with
+        :param bound: EXACT, LOWER_BOUND or UPPER_BOUND
+        :param score: the score of the position
+        :param move: the best move found or None
+        """
+        words = self.words
+        generation = words[GENERATION_WORD]
+        index = HEADER_WORDS + ((key & self.mask) << 1) * ENTRY_WORDS
+        old_data = words[index + 1]
+        if not (
+            words[index] ^ old_data ^ words[index + 2] == key
+            or depth >= (old_data >> DEPTH_SHIFT) & DEPTH_MASK
+            or (old_data >> GENERATION_SHIFT) & GENERATION_MASK != generation
+        ):
+            index += ENTRY_WORDS
+        data = (
+            (score + SCORE_OFFSET) << SCORE_SHIFT
+            | generation << GENERATION_SHIFT
+            | depth << DEPTH_SHIFT
+            | bound
+        )
+        code = encode_move(move)
+        words[index] = key ^ data ^ code
+        words[index + 1] = data
+        words[index + 2] = code
+
+    def close(self):
+        """
+        Detaches this process from the shared memory
+        """
+        self.words.release()
+        self.memory.close()
+
+    def unlink(self):
+        """
+        Frees the shared memory, after all processes have closed it
+        """
+        self.memory.unlink()
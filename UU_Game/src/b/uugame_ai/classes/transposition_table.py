@@ -0,0 +1,95 @@
+from typing import Optional
+from .move import Move, encode_move, decode_move
+
+# bound types of a stored score
+EXACT = 0
+LOWER_BOUND = 1
+UPPER_BOUND = 2
+
+# Layout of the packed data of an entry, from the lowest bits upwards:
+# bound type, depth, generation of the search, the score and the encoded best move.
+# The encoded move grows by DROP_BITS with every drop, so it is the last field and has no limit.
+DEPTH_SHIFT = 2
+GENERATION_SHIFT = 8
+SCORE_SHIFT = 16
+MOVE_SHIFT = 48
+DEPTH_MASK = (1 << (GENERATION_SHIFT - DEPTH_SHIFT)) - 1
+GENERATION_MASK = (1 << (SCORE_SHIFT - GENERATION_SHIFT)) - 1
+SCORE_MASK = (1 << (MOVE_SHIFT - SCORE_SHIFT)) - 1
+SCORE_OFFSET = 1 << 30
+
+
+class TranspositionTable:
+    """
+    Fixed size hash table of search results, indexed by the zobrist key of a position.
+    The entries live in two flat lists, one for the keys and one for the packed data.
+    Every bucket has two entries: the first one keeps the deepest result and is only
+    replaced by an equally deep or deeper search or by an entry of an older search,
+    the second one is replaced every time the first one is kept.
+    """
+
+    def __init__(self, size_bits: int = 16):
+        self.mask = (1 << size_bits) - 1
+        self.keys = [0] * (2 << size_bits)
+        self.data = [0] * (2 << size_bits)
+        self.generation = 0
+        self.probes = 0
+        self.hits = 0
+
+    def new_search(self):
+        """
+        Marks the entries stored so far as old, so they are replaced first
+        """
+        self.generation = (self.generation + 1) & GENERATION_MASK
+
+    def clear(self):
+        for i in range(len(self.keys)):
+            self.keys[i] = 0
+            self.data[i] = 0
+
+    def probe(self, key: int) -> Optional[tuple[int, int, int, Optional[Move]]]:
+        """
+        Looks up a position
+        :param key: the zobrist key of the position
+        :return: depth, bound type, score and best move of the entry or None
+        """
+        self.probes += 1
+        slot = (key & self.mask) << 1
+        if self.keys[slot] != key:
+            slot += 1
+            if self.keys[slot] != key:
+                return None
+        self.hits += 1
+        data = self.data[slot]
+        return (
+            (data >> DEPTH_SHIFT) & DEPTH_MASK,
+            data & 3,
+            ((data >> SCORE_SHIFT) & SCORE_MASK) - SCORE_OFFSET,
+            decode_move(data >> MOVE_SHIFT),
+        )
+
+    def store(self, key: int, depth: int, bound: int, score: int, move: Optional[Move]):
+        """
+        Stores the result of a search
+        :param key: the zobrist key of the position
+        :param depth: the depth the position was searched with
+        :param bound: EXACT, LOWER_BOUND or UPPER_BOUND
+        :param score: the score of the position
+        :param move: the best move found or None
+        """
+        slot = (key & self.mask) << 1
+        old_data = self.data[slot]
+        if not (
+            self.keys[slot] == key
+            or depth >= (old_data >> DEPTH_SHIFT) & DEPTH_MASK
+            or (old_data >> GENERATION_SHIFT) & GENERATION_MASK != self.generation
+        ):
+            slot += 1
+        self.keys[slot] = key
+        self.data[slot] = (
+            encode_move(move) << MOVE_SHIFT
+            | (score + SCORE_OFFSET) << SCORE_SHIFT
+            | self.generation << GENERATION_SHIFT
+            | depth << DEPTH_SHIFT
+            | bound
+        )
@@ -0,0 +1,148 @@
+import multiprocessing
+from multiprocessing import resource_tracker
+import os
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Optional
+from .shared_transposition_table import SharedTranspositionTable
+
+
+def warm_up_worker(shared_alpha, ponder_stop, mcts_stop):
+    """
+    Runs once in every worker process when it is started:
+    imports the search, allocates the transposition table of the process
+    and connects the alpha bound shared by the workers and the stop flags for pondering
+    and for the Monte Carlo tree search
+    :param shared_alpha: the shared alpha bound of the pool
+    :param ponder_stop: the stop flags for pondering of the pool, one per color id
+    :param mcts_stop: the stop flag of the Monte Carlo tree search of the pool
+    """
+    from ..functions.minimax import get_transposition_table
+    from ..functions import mcts, parallel_search, ponder
+
+    get_transposition_table()
+    parallel_search.shared_alpha = shared_alpha
+    ponder.ponder_stop = ponder_stop
+    mcts.mcts_stop = mcts_stop
+
+
+def worker_id() -> int:
+    return os.getpid()
+
+
+class WorkerPool:
+    """
+    Pool of AI worker processes which lives as long as the game session.
+    The processes are started once and reused for every move, so a move does not pay
+    for starting processes and importing modules, and the transposition table of a
+    worker is kept between moves.
+    Both players of a game can use the same pool, each player who ponders needs a worker more.
+    :param workers: number of worker processes
+    """
+
+    def __init__(self, workers: int = 1):
+        self.workers = workers
+        self.executor: Optional[ProcessPoolExecutor] = None
+        # best score found so far at the root of a parallel search
+        self.shared_alpha = multiprocessing.Value("q", 0)
+        # set to stop the search of a player which runs while the opponent thinks, by color id
+        self.ponder_stop = multiprocessing.Array("b", 2)
+        self.pondering: dict[int, Future] = {}
+        # set to stop the playouts of the Monte Carlo tree search in all workers
+        self.mcts_stop = multiprocessing.Value("b", 0)
+        # transposition table shared by the workers, created when it is used first
+        self.shared_table: Optional[SharedTranspositionTable] = None
+        # seconds needed to start the processes, None until the pool is started
+        self.startup_time: Optional[float] = None
+        self.tasks = 0
+
+    def start(self):
+        """
+        Starts the worker processes and waits until all of them are ready
+        """
+        if self.executor is not None:
+            return
+        start_time = time.perf_counter()
+        if os.name == "posix":
+            # the workers have to share the resource tracker of this process, otherwise each
+            # worker starts its own one which frees the shared table when the worker exits
+            resource_tracker.ensure_running()
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=warm_up_worker,
+            initargs=(self.shared_alpha, self.ponder_stop, self.mcts_stop),
+        )
+        # a process is only started for a task, so every worker gets one
+        futures = [self.executor.submit(worker_id) for _ in range(self.workers)]
+        for future in futures:
+            future.result()
+        self.startup_time = time.perf_counter() - start_time
+
+    def get_shared_table(self) -> SharedTranspositionTable:
+        """
+        :return: the transposition table in shared memory for the workers of this pool
+        """
+        if self.shared_table is None:
+            self.shared_table = SharedTranspositionTable()
+        return self.shared_table
+
+    def submit(self, function, *args) -> Future:
+        """
+        Runs a function in one of the workers, the pool is started if needed
+        :return: the future of the result
+        """
+        self.start()
+        self.tasks += 1
+        return self.executor.submit(function, *args)
+
+    def start_pondering(self, color: int, function, *args):
+        """
+        Runs a search of a player in one of the workers until stop_pondering is called for the player,
+        the search has to stop when ponder_stop of the color is set
+        :param color: color id of the player who ponders
+        """
+        self.stop_pondering(color)
+        self.ponder_stop[color] = 0
+        self.pondering[color] = self.submit(function, *args)
+
+    def stop_pondering(self, color: int):
+        """
+        Stops the search started by start_pondering for a player and waits for it,
+        the search of the other player goes on
+        :param color: color id of the player who pondered
+        :return: the result of the search, None if there was none
+        """
+        future = self.pondering.pop(color, None)
+        if future is None:
+            return None
+        self.ponder_stop[color] = 1
+        return future.result()
+
+    def shutdown(self):
+        """
+        Stops the worker processes, the pool can be started again afterwards
+        """
+        for color in list(self.pondering):
+            self.stop_pondering(color)
+        if self.executor is not None:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+            self.executor = None
+        if self.shared_table is not None:
+            self.shared_table.close()
+            self.shared_table.unlink()
+            self.shared_table = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.shutdown()
+
+    def __str__(self):
+        if self.startup_time is None:
+            return f"WorkerPool({self.workers} workers, not started)"
+        return (
+            f"WorkerPool({self.workers} workers, started in {self.startup_time:.3f}s, "
+            f"{self.tasks} tasks)"
+        )
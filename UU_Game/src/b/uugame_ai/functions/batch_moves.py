@@ -0,0 +1,78 @@
+import numpy as np
+from ..classes.drop_tables import DropTables
+from ..classes.move import Move
+from ..functions.batch_scoring import STANDING, top_stones
+
+
+def placement_masks(boards: np.ndarray, reserves: np.ndarray, player_color: int) -> np.ndarray:
+    """
+    Finds the placements of a batch of encoded positions
+    :param boards: N x cells x layers stones of encode_stacks
+    :param reserves: N x 4 stones left in the boxes of encode_stacks
+    :param player_color: color id of the player who's turn it is in all positions
+    :return: N x 2 x cells bool array, True where a flat (index 0) or standing (index 1) stone can be placed
+    """
+    open_cells = top_stones(boards)[1] < STANDING
+    stones_left = reserves[:, player_color * 2 : player_color * 2 + 2] > 0
+    return open_cells[:, None, :] & stones_left[:, :, None]
+
+
+def stack_move_masks(boards: np.ndarray, tables: DropTables) -> np.ndarray:
+    """
+    Finds the stack moves of a batch of encoded positions: a move is possible if the stack
+    has more stones than the move carries and the stack can walk as far as the move drops stones
+    :param boards: N x cells x layers stones of encode_stacks
+    :param tables: the drop tables of the board size and carry limit
+    :return: N x moves bool array, True where the move of tables.stack_moves is possible
+    """
+    stacks, tops = top_stones(boards)
+    heights = (stacks != 0).sum(axis=0)
+    carried = np.minimum(heights - 1, tables.carry_limit)
+
+    # the cells a stack can walk over end at the first standing stone or at the border,
+    # which is the extra cell at the end
+    open_cells = np.concatenate((tops < STANDING, np.zeros((len(boards), 1), dtype=bool)), axis=1)
+    reach = np.cumprod(open_cells[:, tables.ray_cells], axis=3).sum(axis=3)
+
+    return (tables.move_counts <= carried[:, tables.move_cells]) & (
+        tables.move_lengths <= reach[:, tables.move_cells, tables.move_directions]
+    )
+
+
+def batch_possible_moves(
+    boards: np.ndarray,
+    reserves: np.ndarray,
+    player_color: int,
+    tables: DropTables,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Finds the possible moves of a batch of encoded positions with array operations,
+    see placement_masks and stack_move_masks
+    :param boards: N x cells x layers stones of encode_stacks
+    :param reserves: N x 4 stones left in the boxes of encode_stacks
+    :param player_color: color id of the player who's turn it is in all positions
+    :param tables: the drop tables of the board size and carry limit
+    :return: the placement masks and the stack move masks
+    """
+    return placement_masks(boards, reserves, player_color), stack_move_masks(boards, tables)
+
+
+def moves_of(placements: np.ndarray, stack_moves: np.ndarray, tables: DropTables) -> list[Move]:
+    """
+    Lists the moves of one position of batch_possible_moves
+    :param placements: 2 x cells placement mask of the position
+    :param stack_moves: stack move mask of the position
+    :param tables: the drop tables the masks were found with
+    :return: the moves in the order of possible_moves
+    """
+    moves = [tables.stack_moves[index] for index in np.flatnonzero(stack_moves)]
+    for is_standing in (False, True):
+        moves += [Move(int(cell), is_standing) for cell in np.flatnonzero(placements[int(is_standing)])]
+    return moves
+
+
+def count_moves(placements: np.ndarray, stack_moves: np.ndarray) -> np.ndarray:
+    """
+    :return: the number of possible moves of each position of batch_possible_moves
+    """
+    return placements.sum(axis=(1, 2)) + stack_moves.sum(axis=1)
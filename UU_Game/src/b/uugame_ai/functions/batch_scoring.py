@@ -0,0 +1,264 @@
+from typing import Optional, Sequence
+import numpy as np
+from uu_game.vec2 import Vec2
+from ..classes.geometry import Geometry
+from ..classes.move import Move
+from ..classes.position import COLOR_SHIFT, HEIGHT_MASK, STANDING_BIT, Position
+from ..functions.road_threats import road_threats
+
+# Stones of an encoded position: one code per cell and layer (height) from the bottom up,
+# 0 for no stone, FLAT + color id for a flat stone and STANDING + color id for a standing stone
+FLAT = 1
+STANDING = 3
+# number of different codes
+CODES = 5
+
+
+def encode_stacks(cells: Sequence[Sequence[int]], reserves: Sequence[Sequence[int]]) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Encodes the packed stacks of positions of the same size for batch_scoring
+    :param cells: Position.cells of each position
+    :param reserves: Position.reserves of each position
+    :return: the stones as N x cells x layers uint8 array, see FLAT,
+             with as many layers as the highest stack has stones,
+             and the stones left in the boxes as N x 4 array, indexed like Position.reserves
+    """
+    cells = np.array(cells, dtype=np.int64)
+    heights = cells & HEIGHT_MASK
+    layers = max(int(heights.max(initial=0)), 1)
+
+    boards = np.zeros(cells.shape + (layers,), dtype=np.uint8)
+    # only the top stone of a stack can stand
+    top_codes = np.where(cells & STANDING_BIT, STANDING, FLAT)
+    for layer in range(layers):
+        colors = (cells >> (COLOR_SHIFT + layer)) & 1
+        codes = np.where(heights - 1 == layer, top_codes, FLAT) + colors
+        boards[:, :, layer] = np.where(heights > layer, codes, 0)
+    return boards, np.array(reserves, dtype=np.int64)
+
+
+def encode_positions(positions: Sequence[Position]) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Encodes positions of the same size for batch_scoring, see encode_stacks
+    """
+    return encode_stacks(
+        [position.cells for position in positions], [position.reserves for position in positions]
+    )
+
+
+def decode_position(board: np.ndarray, reserves: np.ndarray, geometry: Geometry, carry_limit: int) -> Position:
+    """
+    Turns one encoded position of encode_stacks back into a position
+    """
+    position = Position(Vec2(geometry.size_x, geometry.size_y), carry_limit)
+    for index, codes in enumerate(board.tolist()):
+        height = len(codes) - codes.count(0)
+        if height:
+            stack = height | (STANDING_BIT if codes[height - 1] >= STANDING else 0)
+            for layer in range(height):
+                stack |= ((codes[layer] - 1) & 1) << (COLOR_SHIFT + layer)
+            position.set_cell(index, stack)
+    position.reserves = reserves.tolist()
+    return position
+
+
+def bitmasks(cells: np.ndarray) -> np.ndarray:
+    """
+    Packs the cells of a batch into bitmasks like the ones of Position
+    :param cells: N x cells bool array
+    :return: N uint64 array
+    """
+    bits = np.left_shift(np.uint64(1), np.arange(cells.shape[1], dtype=np.uint64))
+    return np.bitwise_or.reduce(np.where(cells, bits, np.uint64(0)), axis=1)
+
+
+def can_batch(geometry: Geometry) -> bool:
+    """
+    :param geometry: the tables of the board size
+    :return: True if the batch functions can handle the board size: road_cells keeps each bitmask
+             in a 64 bit slot, which a shift by a column must not leave
+    """
+    return geometry.cell_count + geometry.size_y <= 64
+
+
+def road_cells(roads: np.ndarray, open_cells: np.ndarray, geometry: Geometry) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Finds the completed roads and the cells on which a flat stone completes a road for a batch,
+    like has_road and road_threats.road_completing_cells.
+    The four floods from the sides of all roads run together on one long integer,
+    which holds the bitmask of each road and side in its own 64 bit slot: every operation
+    of the flood is done for the whole batch at once, and the loop runs only as often
+    as the longest flood needs.
+    :param roads: uint64 bitmasks of the cells with a flat stone of the color on top
+    :param open_cells: uint64 bitmasks of the cells a stone can be placed on
+    :param geometry: the tables of the board size, at most 64 - size_y cells
+                     so a shift by a column does not reach the next slot, see can_batch
+    :return: bool array which is True for the completed roads,
+             and uint64 bitmasks of the cells which complete a road
+    """
+    if not can_batch(geometry):
+        raise ValueError(f"a batch of {geometry.size_x}x{geometry.size_y} boards does not fit into 64 bit slots")
+    sides = [side for start_side, end_side in geometry.road_sides for side in (start_side, end_side)]
+    slots = len(sides) * len(roads)
+    # a 1 in the lowest bit of every slot, a mask times it is the mask in every slot
+    ones = int.from_bytes(np.ones(slots, dtype=np.uint64).tobytes(), "little")
+    full = geometry.full * ones
+    not_first_row = geometry.not_first_row * ones
+    not_last_row = geometry.not_last_row * ones
+    column = geometry.size_y
+
+    def spread(cells: int) -> int:
+        return (
+            cells
+            | (cells << column)
+            | (cells >> column)
+            | ((cells << 1) & not_first_row)
+            | ((cells >> 1) & not_last_row)
+        ) & full
+
+    def unpack(cells: int) -> np.ndarray:
+        return np.frombuffer(cells.to_bytes(slots * 8, "little"), dtype=np.uint64).reshape(len(sides), -1)
+
+    # slot side * N + road holds the road and the side its flood starts from
+    road = int.from_bytes(np.tile(roads, len(sides)).tobytes(), "little")
+    starts = int.from_bytes(np.repeat(np.array(sides, dtype=np.uint64), len(roads)).tobytes(), "little")
+    reached = starts & road
+    while True:
+        grown = spread(reached) & road
+        if grown == reached:
+            break
+        reached = grown
+
+    sides = np.array(sides, dtype=np.uint64)[:, None]
+    connected = unpack(spread(reached) | starts)
+    reached = unpack(reached)
+    completed = ((reached[0] & sides[1]) | (reached[2] & sides[3])) != 0
+    cells = (connected[0] & connected[1]) | (connected[2] & connected[3])
+    return completed, cells & open_cells & ~roads
+
+
+def top_stones(boards: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    :param boards: N x cells x layers stones of encode_stacks
+    :return: the stones as one N x cells int64 array per layer, and the top stones as N x cells array
+    """
+    # operations across the few layers of a stack are slow, so each layer gets its own array
+    stacks = np.moveaxis(boards, 2, 0).astype(np.int64)
+    # the stacks grow from the bottom, so the top stone is the highest stone which is not 0
+    tops = stacks[0]
+    for layer in stacks[1:]:
+        tops = np.where(layer != 0, layer, tops)
+    return stacks, tops
+
+
+def batch_roads(
+    boards: np.ndarray,
+    reserves: np.ndarray,
+    geometry: Geometry,
+    carry_limit: int = 5,
+    tops: Optional[np.ndarray] = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Finds the roads and the road threats of both colors for a batch of encoded positions
+    :param boards: N x cells x layers stones of encode_stacks
+    :param reserves: N x 4 stones left in the boxes of encode_stacks
+    :param geometry: the tables of the board size
+    :param carry_limit: the maximum number of stones that can be carried
+    :param tops: the top stones of top_stones if they are already known
+    :return: N x 2 bool arrays indexed by color id, True if the color has a road
+             and True if road_threats finds a cell for the color
+    """
+    count, cells, _ = boards.shape
+    if tops is None:
+        tops = top_stones(boards)[1]
+
+    # the roads of both colors are searched together
+    roads = bitmasks((tops == np.array([FLAT, FLAT + 1])[:, None, None]).reshape(2 * count, cells))
+    open_cells = np.tile(bitmasks(tops < STANDING), 2)
+    completed, completing_cells = road_cells(roads, open_cells, geometry)
+    completed = completed.reshape(2, count).T
+    threats = (completing_cells != 0).reshape(2, count).T
+
+    # with flat stones left all cells a flat stone completes a road on are threats of road_threats,
+    # without them the threats depend on the stacks, which is rare enough to ask road_threats
+    for index, color in zip(*np.nonzero(threats & (reserves[:, 0::2] == 0))):
+        position = decode_position(boards[index], reserves[index], geometry, carry_limit)
+        threats[index, color] = bool(road_threats(position, int(color)))
+    return completed, threats
+
+
+def batch_scoring(
+    boards: np.ndarray,
+    reserves: np.ndarray,
+    player_color: int,
+    geometry: Geometry,
+    carry_limit: int = 5,
+    threats: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    Calculates the score of scoring for a batch of encoded positions with array operations,
+    so the interpreter overhead is paid once per batch instead of once per position.
+    :param boards: N x cells x layers stones of encode_stacks
+    :param reserves: N x 4 stones left in the boxes of encode_stacks
+    :param player_color: color id of player who's turn it is in all positions
+    :param geometry: the tables of the board size
+    :param carry_limit: the maximum number of stones that can be carried
+    :param threats: the road threats of batch_roads if they are already known
+    :return: the scores as N array of int64, equal to scoring of each position
+    """
+    opponent_color = 1 - player_color
+    count = len(boards)
+    player_flat, opponent_flat = FLAT + player_color, FLAT + opponent_color
+    player_wall = STANDING + player_color
+
+    stacks, tops = top_stones(boards)
+    if threats is None:
+        threats = batch_roads(boards, reserves, geometry, carry_limit, tops)[1]
+
+    # counts of the top stones and of the pairs of stones lying directly on each other
+    # per position, indexed by code and by lower code * CODES + upper code
+    rows = np.arange(count)[:, None]
+    top_counts = np.bincount((rows * CODES + tops).ravel(), minlength=count * CODES)
+    top_counts = top_counts.reshape(count, CODES)
+    pairs = (stacks[:-1] * CODES + stacks[1:] + rows * CODES * CODES).ravel()
+    pair_counts = np.bincount(pairs, minlength=count * CODES * CODES).reshape(count, CODES * CODES)
+
+    # +500 for chance to win with next move, -1000 if opponent could win with next move
+    scores = np.where(threats[:, player_color], 500, 0) + np.where(threats[:, opponent_color], -1000, 0)
+
+    # stones left, like scoring
+    total_own_stones = reserves[:, player_color * 2] * 2
+    scores += np.maximum(-5 * (total_own_stones - 3) ** 2 + 20, -25)
+    scores += np.where((total_own_stones >= 11) & (total_own_stones <= 14), (10 - total_own_stones) * 10, 0)
+
+    # ratio of stones on top, standing stones on own or other color, too many standing stones
+    # and own color stacked, a standing stone can only be the upper stone of a pair
+    scores += (top_counts[:, player_flat] - top_counts[:, opponent_flat]) * 3
+    scores += pair_counts[:, player_flat * CODES + player_wall] * -20
+    scores += pair_counts[:, opponent_flat * CODES + player_wall] * 5
+    scores += np.minimum((top_counts[:, player_wall] - 3) * -8, 0)
+    scores += pair_counts[:, player_flat * CODES + player_flat] * 15
+    return scores
+
+
+def frontier_scores(position: Position, moves: Sequence[Move], player_color: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Evaluates the positions after each of the moves in one batch
+    :param position: actual board state, unchanged when the function returns
+    :param moves: the moves to evaluate
+    :param player_color: color id of player who's turn it is
+    :return: the scores of the positions after the moves for the player, -scoring for the opponent,
+             and which of the positions are quiet: no color has a road or a road threat in them
+    """
+    cells = []
+    reserves = []
+    for move in moves:
+        position.apply_move(move, player_color)
+        cells.append(position.cells.copy())
+        reserves.append(position.reserves.copy())
+        position.undo_move(move, player_color)
+    boards, reserves = encode_stacks(cells, reserves)
+    roads, threats = batch_roads(boards, reserves, position.geometry, position.carry_limit)
+    scores = batch_scoring(boards, reserves, 1 - player_color, position.geometry, position.carry_limit, threats)
+    quiet = ~(roads.any(axis=1) | threats.any(axis=1))
+    return -scores, quiet
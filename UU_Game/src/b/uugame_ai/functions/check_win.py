@@ -1,85 +1,65 @@
-from ..classes.color import Color
-from ..classes.board import Board
-from ..functions.utils.helper_functions import get_adjacent
+from ..classes.geometry import Geometry
+from ..classes.position import Position
 
 
-def check_winning(board: Board, color: Color) -> tuple[bool, list[tuple[int, int]]]:
+def has_road(position: Position, color: int) -> bool:
     """
-    This function checks if the given color won the game
-    :param board: the actual state of the board
-    :param color: the color for which it is checked if the player won
-    :return: boolean if game is won or not
-    :return: winning path as a list of board coordinates
+    Checks if the flat top stones of a color connect two opposite sides of the board.
+    This is the fast check for the search, use check_winning to get the road.
+    :param position: the actual state of the board
+    :param color: the color id for which it is checked if the player won
+    :return: True if the color has a road
     """
+    return position.geometry.connects_sides(position.flats[color])
 
-    # check if player won vertical
-    startpoint_v = [(0, y) for y in range(board.size.y)]
-    for point in startpoint_v:
-        res, path = is_winning(point[0], point[1], -1, -1, board, color, "v")
-        if res:
-            return res, path
 
-    # check if player won horizontal
-    startpoint_h = [(x, 0) for x in range(board.size.x)]
-    for point in startpoint_h:
-        res, path = is_winning(point[0], point[1], -1, -1, board, color, "h")
-        if res:
-            return res, path
+def find_road(geometry: Geometry, road: int, start_side: int, end_side: int) -> list[int]:
+    """
+    Finds a shortest road between two sides of the board by a flood fill which keeps
+    the cells it reached in each step, and then walks back through the steps.
+    :param geometry: the tables of the board size
+    :param road: bitmask of the cells which can be part of the road
+    :param start_side: bitmask of the cells of the side the road starts on
+    :param end_side: bitmask of the cells of the other side
+    :return: the cell indices of the road from start_side to end_side, empty if there is none
+    """
+    steps = [start_side & road]
+    reached = steps[0]
+    while not reached & end_side:
+        new = geometry.spread(reached) & road & ~reached
+        if not new:
+            return []
+        steps.append(new)
+        reached |= new
 
-    # case if player did not won yet
-    return False, []
+    cells = steps[-1] & end_side
+    cell = (cells & -cells).bit_length() - 1
+    path = [cell]
+    for step in reversed(steps[:-1]):
+        cells = geometry.spread(1 << cell) & step
+        cell = (cells & -cells).bit_length() - 1
+        path.append(cell)
+    path.reverse()
+    return path
 
 
-def is_winning(
-    x: int,
-    y: int,
-    x_old: int,
-    y_old: int,
-    board: Board,
-    color: Color,
-    direction: str,
-    depth=0,
-) -> tuple[bool, list[tuple[int, int]]]:
+def check_winning(position: Position, color: int) -> tuple[bool, list[tuple[int, int]]]:
     """
-    Function that is recursively building a path to the other side of the board on the players stones.
-    :param x: the actual x-coordinate
-    :param y: the actual y-coordinate
-    :param x_old: the x-coordinate from the function call before
-    :param y_old: the y-coordinate from the function call before
-    :param board: the actual state of the board
-    :param color: the color of the player
-    :param direction: the direction of the path ("v" for vertical or "h" for horizontal)
-    :param depth: the depth of the recursion, because the longest winning path is 7
-    :return: True if other side of direction is reached and the path otherwise False and empty list
+    This function checks if the given color won the game
+    :param position: the actual state of the board
+    :param color: the color id for which it is checked if the player won
+    :return: boolean if game is won or not
+    :return: winning path as a list of board coordinates
     """
-
-    # max depth is reached or there is no stone
-    if (depth == 8) or (len(board.get_cell(x, y)) == 0):
+    if not has_road(position, color):
         return False, []
-    # stone has wrong color or is standing
-    if (board.get_cell(x, y)[-1].color != color) or (
-        board.get_cell(x, y)[-1].is_standing
-    ):
-        return False, []
-    # other side is reached in vertical way
-    if (direction == "v") and (x == board.size.x - 1):
-        return True, [(x, y)]
-    # other side is reached in horizontal way
-    if (direction == "h") and (y == board.size.y - 1):
-        return True, [(x, y)]
-
-    neighbors = get_adjacent(board, x, y)
-
-    # iterate over all neighbors and recursively call function with new coordinates
-    for neighbors in neighbors:
-        x_new = neighbors[0]
-        y_new = neighbors[1]
 
-        # cell was visited before and therefor is skipped
-        if (x_new == x_old) and (y_new == y_old):
-            continue
-        res, path = is_winning(x_new, y_new, x, y, board, color, direction, depth + 1)
-        if res:
-            return True, path + [(x, y)]
+    geometry = position.geometry
+    road = position.flats[color]
 
+    # check if player won vertical, then horizontal
+    for start_side, end_side in geometry.road_sides:
+        path = find_road(geometry, road, start_side, end_side)
+        if path:
+            return True, [position.coordinates(cell) for cell in path]
     return False, []
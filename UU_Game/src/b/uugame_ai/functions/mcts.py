@@ -0,0 +1,267 @@
+import random
+import time
+from concurrent.futures import wait
+from typing import Callable, Optional
+from ..classes.mcts_node import MctsNode
+from ..classes.move import Move
+from ..classes.position import HEIGHT_MASK, Position
+from ..classes.search_context import SearchContext
+from ..classes.worker_pool import WorkerPool
+from ..functions.check_win import has_road
+from ..functions.move_ordering import order_moves
+from ..functions.possible_moves import possible_moves, stack_moves
+from ..functions.road_threats import road_completing_cells
+from ..functions.symmetry import unique_moves
+from ..functions.top_stone_winner import top_stone_winner
+from ..functions.utils.helper_functions import cells_of
+
+# weight of the visits against the win rate when a child is selected (UCT)
+EXPLORATION = 1.4
+# the playout policy places a stone with this probability and otherwise moves a stack,
+# and a placed stone is standing with STANDING_RATE
+PLACEMENT_RATE = 0.8
+STANDING_RATE = 0.1
+# playouts which are not over after this many moves are won by the player with more flat stones on top
+PLAYOUT_PLIES = 60
+# number of playouts between two looks at the clock
+CLOCK_INTERVAL = 16
+
+# stop flag of the pool, set by WorkerPool when a worker is started
+mcts_stop = None
+
+
+def game_result(position: Position, color: int) -> Optional[float]:
+    """
+    Checks if the game is over after a move
+    :param position: board state after the move
+    :param color: color id of the player who made the move
+    :return: 1, 0.5 or 0 for a win, draw or loss of the player, None if the game goes on
+    """
+    player_road = has_road(position, color)
+    opponent_road = has_road(position, 1 - color)
+    if player_road or opponent_road:
+        if player_road and opponent_road:
+            return 0.5
+        return 1.0 if player_road else 0.0
+    return None
+
+
+def flat_result(position: Position, color: int) -> float:
+    """
+    The result for a color of a game which is decided by the flat stones on top
+    """
+    winner = top_stone_winner(position)
+    if winner is None:
+        return 0.5
+    return 1.0 if winner == color else 0.0
+
+
+def playout_move(position: Position, color: int, rng: random.Random) -> Optional[Move]:
+    """
+    Picks the move of the playout policy for a player who can't complete a road with a placement:
+    a placement which blocks a road of the opponent,
+    otherwise a random placement or a random move of a random stack, see PLACEMENT_RATE.
+    :param position: actual board state
+    :param color: color id of player who's turn it is
+    :param rng: random numbers of the playout
+    :return: the move, None if there is no possible move
+    """
+    flat_stones_left = position.reserves[color * 2]
+    standing_stones_left = position.reserves[color * 2 + 1]
+    if flat_stones_left or standing_stones_left:
+        blocks = road_completing_cells(position, 1 - color)
+        if blocks:
+            is_standing = not flat_stones_left or (standing_stones_left > 0 and rng.random() < 0.5)
+            return Move(rng.choice(list(cells_of(blocks))), is_standing)
+
+        open_cells = position.geometry.full & ~(position.walls[0] | position.walls[1])
+        if open_cells and rng.random() < PLACEMENT_RATE:
+            is_standing = not flat_stones_left or (standing_stones_left > 0 and rng.random() < STANDING_RATE)
+            # most cells are open, so drawing cells until an open one is hit is faster than listing them
+            cell = rng.randrange(position.geometry.cell_count)
+            while not open_cells >> cell & 1:
+                cell = rng.randrange(position.geometry.cell_count)
+            return Move(cell, is_standing)
+
+    # the bottom stone of a stack can't be moved, so only stacks of two or more stones can
+    stacks = [index for index, stack in enumerate(position.cells) if stack & HEIGHT_MASK > 1]
+    if stacks:
+        moves = stack_moves(position, rng.choice(stacks))
+        if moves:
+            return rng.choice(moves)
+    moves = possible_moves(position, color)
+    return rng.choice(moves) if moves else None
+
+
+def playout(position: Position, color: int, rng: random.Random) -> float:
+    """
+    Plays the game on from a position with the playout policy, see playout_move.
+    The position is changed.
+    :param position: board state after the move of the opponent
+    :param color: color id of player who's turn it is
+    :param rng: random numbers of the playout
+    :return: the result for the opponent, who made the last move: 1, 0.5 or 0 for a win, draw or loss
+    """
+    player_color = color
+    for _ in range(PLAYOUT_PLIES):
+        # a player who can complete a road with a placement does it
+        if position.reserves[color * 2] and road_completing_cells(position, color):
+            result = 1.0
+        else:
+            move = playout_move(position, color, rng)
+            if move is None:
+                # there is no move left, which the game counts as a draw
+                return 0.5
+            position.apply_move(move, color)
+            # the placements of playout_move never complete a road
+            result = game_result(position, color) if move.drops else None
+        if result is not None:
+            return result if color != player_color else 1 - result
+        color = 1 - color
+
+    return flat_result(position, 1 - player_color)
+
+
+def tree_moves(position: Position, color: int) -> list[Move]:
+    """
+    The moves of a new tree node, the best guess of move_priority last, so it is tried first
+    """
+    moves = list(unique_moves(position, possible_moves(position, color)))
+    moves = order_moves(position, moves, color, None, SearchContext(), 0)
+    moves.reverse()
+    return moves
+
+
+def mcts(
+    position: Position,
+    player_color: int,
+    deadline: float,
+    playout_limit: Optional[int] = None,
+    seed: Optional[int] = None,
+    stop: Optional[Callable[[], bool]] = None,
+) -> tuple[MctsNode, int]:
+    """
+    Builds a UCT tree for the position: each iteration selects a path by the upper confidence bound,
+    adds the node of one untried move at its end, plays the game on from there with a playout
+    and counts the result in all nodes of the path.
+    :param position: actual board state
+    :param player_color: color id of player who's turn it is
+    :param deadline: time.time() at which no more playouts are started
+    :param playout_limit: most playouts, None for no limit
+    :param seed: seed of the random numbers of the playouts
+    :param stop: returns True when another process wants the search to stop
+    :return: the root of the tree and the number of playouts
+    """
+    rng = random.Random(seed)
+    root = MctsNode(None, None, 1 - player_color, tree_moves(position, player_color))
+    playouts = 0
+    while playout_limit is None or playouts < playout_limit:
+        if playouts % CLOCK_INTERVAL == 0 and (time.time() > deadline or (stop is not None and stop())):
+            break
+        board = position.copy()
+        node = root
+        color = player_color
+
+        # 1. selection
+        while not node.untried_moves and node.children:
+            node = node.select_child(EXPLORATION)
+            board.apply_move(node.move, node.color)
+            color = 1 - node.color
+
+        # 2. expansion
+        if node.untried_moves:
+            move = node.untried_moves.pop()
+            board.apply_move(move, color)
+            result = game_result(board, color)
+            untried_moves = tree_moves(board, 1 - color) if result is None else []
+            node = node.add_child(move, color, untried_moves, result)
+
+        # 3. playout, nothing to play if the game is over in the node
+        if node.result is not None:
+            result = node.result
+        elif node.untried_moves:
+            result = playout(board, 1 - node.color, rng)
+        else:
+            # no possible move, which the game counts as a draw
+            node.result = result = 0.5
+
+        # 4. backpropagation
+        node.update(result)
+        playouts += 1
+
+    return root, playouts
+
+
+def mcts_worker(
+    position: Position,
+    player_color: int,
+    deadline: float,
+    playout_limit: Optional[int],
+    seed: int,
+) -> tuple[dict[Move, tuple[int, float]], int]:
+    """
+    Builds a tree in one worker of a parallel Monte Carlo tree search,
+    until the deadline or until the pool sets mcts_stop
+    :return: visits and wins of each move of the root, and the number of playouts
+    """
+    root, playouts = mcts(position, player_color, deadline, playout_limit, seed, lambda: bool(mcts_stop.value))
+    return {child.move: (child.visits, child.wins) for child in root.children}, playouts
+
+
+def find_best_move_mcts(
+    pool: WorkerPool,
+    position: Position,
+    player_color: int,
+    time_limit: float,
+    playout_limit: Optional[int] = None,
+    start_time: Optional[float] = None,
+    timeout: Optional[float] = None,
+    workers: Optional[int] = None,
+) -> tuple[float, Optional[Move], int, float]:
+    """
+    Searches the best move with a Monte Carlo tree search in the workers of the pool (root parallelization):
+    every worker builds its own tree with other random numbers, and the visits and wins
+    of the moves at the roots are added up. The move with the most visits is played.
+    :param pool: the worker processes
+    :param position: actual board state
+    :param player_color: color id of player who's turn it is
+    :param time_limit: seconds after which no more playouts are started
+    :param playout_limit: most playouts of all workers together, None for no limit
+    :param start_time: time.time() when the move was started, defaults to now
+    :param timeout: seconds after which the workers are stopped through mcts_stop, None for no limit
+    :param workers: number of trees, one per worker, None for all workers of the pool
+    :return: the win rate and the best move, None if no worker answered in time,
+             the number of playouts and the playouts per second
+    """
+    if start_time is None:
+        start_time = time.time()
+    deadline = start_time + time_limit
+    workers = pool.workers if workers is None else min(workers, pool.workers)
+    worker_limit = None if playout_limit is None else -(-playout_limit // workers)
+
+    pool.mcts_stop.value = 0
+    futures = [
+        pool.submit(mcts_worker, position, player_color, deadline, worker_limit, random.getrandbits(32))
+        for _ in range(workers)
+    ]
+    wait(futures, timeout=timeout)
+    # workers which are still running stop after their next few playouts and free the pool,
+    # a worker which has not started yet stops at once
+    pool.mcts_stop.value = 1
+    wait(futures)
+
+    statistics: dict[Move, list[float]] = {}
+    playouts = 0
+    for future in futures:
+        root_statistics, worker_playouts = future.result()
+        playouts += worker_playouts
+        for move, (visits, wins) in root_statistics.items():
+            total = statistics.setdefault(move, [0, 0.0])
+            total[0] += visits
+            total[1] += wins
+    playouts_per_second = playouts / max(time.time() - start_time, 1e-9)
+
+    if not statistics:
+        return 0.0, None, playouts, playouts_per_second
+    move, (visits, wins) = max(statistics.items(), key=lambda item: item[1][0])
+    return wins / visits, move, playouts, playouts_per_second
@@ -1,99 +1,411 @@
-from ..functions.remaining_stones import remaining_stones
-from ..classes.board import Board
-from ..classes.color import Color
-from ..classes.stone import Stone
-import numpy as np
+import time
+from typing import Iterable, Iterator, Optional
+from ..classes.move import Move
+from ..classes.position import Position, SIDE_KEY
+from ..classes.search_context import SearchContext, SearchTimeout
+from ..classes.transposition_table import (
+    TranspositionTable,
+    EXACT,
+    LOWER_BOUND,
+    UPPER_BOUND,
+)
 import sys
-from ..functions.check_win import check_winning
-from ..functions.possible_moves import possible_moves
+from ..functions.batch_scoring import can_batch, frontier_scores
+from ..functions.check_win import has_road
+from ..functions.move_ordering import staged_moves
+from ..functions.possible_moves import possible_moves, stack_moves
+from ..functions.road_threats import road_threats
 from ..functions.scoring import scoring
+from ..functions.symmetry import symmetric_key, transform_move, unique_moves
+from ..functions.utils.helper_functions import cells_of
+
+# above every score of the evaluation, which adds up to about +-1500 for threats
+WIN_SCORE = 100000
+# most moves the quiescence search plays after the search depth is reached
+QUIESCENCE_DEPTH = 4
+# half width of the window around the score of the last depth the next depth is searched with
+ASPIRATION_WINDOW = 50
+# the moves from this index on are late moves, which are reduced or pruned if they are quiet
+LATE_MOVES = 3
+# least remaining depth at which late quiet moves are searched one ply less deep
+REDUCTION_DEPTH = 3
+# how far a quiet move can raise the evaluation, by the remaining depth from 1 upwards,
+# quiet moves of positions which are further below alpha are not searched
+FUTILITY_MARGINS = (100, 200)
+
+# table of this process, kept between searches so later turns can use earlier results
+transposition_table: Optional[TranspositionTable] = None
+
+
+def get_transposition_table() -> TranspositionTable:
+    global transposition_table
+    if transposition_table is None:
+        transposition_table = TranspositionTable()
+    return transposition_table
 
 
 def minimax(
-    board: Board,
+    position: Position,
     depth: int,
     alpha: int,
     beta: int,
-    player_color: Color,
-    opponent_color: Color,
-    maximizing: bool
-) -> tuple[int, Board]:
+    player_color: int,
+    opponent_color: int,
+    context: Optional[SearchContext] = None,
+    ply: int = 0,
+) -> tuple[int, Optional[Move]]:
     """
-    This is an implementation of a classical minimax function with alpha-beta pruning.
-    It tries to find the best possible move for the player
-    :param board: actual board state
+    This is an implementation of a classical minimax function with alpha-beta pruning
+    in the negamax form: the score is always seen from the player who's turn it is,
+    so the score of a move is the negated score of the position for the opponent.
+    It tries to find the best possible move for the player.
+    All moves after the first one are searched with a null window first (principal variation search).
+    The moves are played on the given position and taken back afterwards,
+    so the position is unchanged when the function returns.
+    :param position: actual board state
     :param depth: actual search depth
     :param alpha: alpha value for pruning
     :param beta: beta value for pruning
-    :param player_color: color of player who's turn it is
-    :param opponent_color: opponents player color
-    :return: best possible move
+    :param player_color: color id of player who's turn it is
+    :param opponent_color: opponents player color id
+    :param context: transposition table, deadline, node count and move ordering tables of the search
+    :param ply: distance to the root of the search
+    :return: score for the player and best possible move, None if depth is 0 or no move is possible
     """
 
-    # if no move is possible return -100 and the board
-    stones = remaining_stones(board)
-    possible_moves_list = list(
-        set(possible_moves(board, stones[(player_color, False)], stones[(player_color, True)], player_color))
-    )
-
-    if len(possible_moves_list) == 0:
-        return -100, board
+    if context is None:
+        context = SearchContext()
 
-    # if maximum depth is reached the board state gets evaluated
+    # if maximum depth is reached the board state gets evaluated, after the road threats are resolved
     if depth == 0:
-        return scoring(board, player_color, stones), board
+        context.quiescence_searches += 1
+        context.quiescence_limit = context.quiescence_nodes + context.quiescence_budget
+        return quiescence(position, alpha, beta, player_color, opponent_color, context), None
+    context.visit()
 
-    # initialize the best move
-    best_move = possible_moves_list[0]
+    # look up the position, the key includes who's turn it is
+    # early positions are stored as the representative of their symmetry class,
+    # so the stored move is mapped back from the representative onto this position
+    key, transform = symmetric_key(position)
+    key ^= SIDE_KEY if player_color else 0
+    original_alpha = alpha
+    hash_move = None
+    table = context.table
+    if table is not None:
+        entry = table.probe(key)
+        if entry is not None:
+            entry_depth, bound, score, hash_move = entry
+            hash_move = transform_move(
+                position, hash_move, position.geometry.inverse_transforms[transform]
+            )
+            if entry_depth >= depth and (
+                bound == EXACT
+                or (bound == LOWER_BOUND and score >= beta)
+                or (bound == UPPER_BOUND and score <= alpha)
+            ):
+                return score, hash_move
+
+    # the moves most likely to cause a cutoff are tried first,
+    # and the moves after a cutoff are not generated at all
+    # every generated move leads to another position, so the moves need no deduplication:
+    # stack moves differ in the heights they add to the cells and placements use up a stone
+    # without ordering the moves come in the order of the move generator
+    if context.ordering:
+        ordered_moves = staged_moves(position, player_color, hash_move, context, ply)
+    else:
+        ordered_moves = possible_moves(position, player_color)
+    possible_moves_list = unique_moves(position, ordered_moves)
 
-    # player tries so maximize the score
-    if maximizing:
-        maxEval = -sys.maxsize
-        for move in possible_moves_list:
+    # late quiet moves are searched less deep or not at all, unless the player has to block a road
+    # the root and the nodes searched with an open window (PV nodes) decide the score, so only
+    # the nodes of the null window searches are reduced
+    reduce = context.reductions and depth >= REDUCTION_DEPTH and ply > 0 and beta - alpha == 1
+    futile = (
+        context.futility
+        and depth <= len(FUTILITY_MARGINS)
+        and abs(alpha) < WIN_SCORE
+        and scoring(position, player_color) + FUTILITY_MARGINS[depth - 1] <= alpha
+    )
+    if (reduce or futile) and road_threats(position, opponent_color):
+        reduce = futile = False
 
-            # player won, directly return very high score
-            player_won, _ = check_winning(move, player_color)
-            if player_won:
-                return +1000, move
+    # the late moves of the last ply are evaluated in one batch, see batched_frontier,
+    # on boards small enough for the batch functions
+    frontier: dict[Move, int] = {}
+    if depth == 1 and can_batch(position.geometry):
+        possible_moves_list = batched_frontier(position, player_color, possible_moves_list, frontier)
 
-            # opponent won directly return very low score
-            opponent_won, _ = check_winning(move, opponent_color)
-            if opponent_won:
-                return -1000, move
+    best_move = None
+    max_eval = -sys.maxsize
 
-            eval, _ = minimax(
-                move, depth - 1, alpha, beta, opponent_color, player_color, False
-            )
-            if eval > maxEval:
-                maxEval = eval
+    for index, move in enumerate(possible_moves_list):
+        if move in frontier:
+            # a quiet position after the move, which the quiescence search would only evaluate
+            context.visit()
+            if futile:
+                context.futility_pruned += 1
+                continue
+            eval = frontier[move]
+            if eval > max_eval:
+                max_eval = eval
                 best_move = move
-            alpha = max(alpha, maxEval)
+            alpha = max(alpha, max_eval)
             if beta <= alpha:
+                context.add_cutoff(move, player_color, depth, ply)
                 break
-        return maxEval, best_move
+            continue
+
+        position.apply_move(move, player_color)
+
+        # a move is quiet if it is ordered late and does not threaten to complete a road
+        quiet = (
+            (reduce or futile)
+            and index >= LATE_MOVES
+            and not road_threats(position, player_color)
+        )
+
+        # player won, very high score
+        # opponent won, very low score
+        if has_road(position, player_color):
+            eval = WIN_SCORE
+        elif has_road(position, opponent_color):
+            eval = -WIN_SCORE
+        elif futile and quiet:
+            # the position is too far below alpha for a quiet move to reach it
+            position.undo_move(move, player_color)
+            context.futility_pruned += 1
+            continue
+        elif best_move is None:
+            eval = -minimax(
+                position, depth - 1, -beta, -alpha, opponent_color, player_color, context, ply + 1
+            )[0]
+        else:
+            # the first move is most likely the best, the others only have to be proven worse,
+            # which a search with a null window does faster, only if it fails they are searched again
+            reduction = 1 if reduce and quiet else 0
+            context.reduced += reduction
+            eval = -minimax(
+                position, depth - 1 - reduction, -alpha - 1, -alpha, opponent_color, player_color, context, ply + 1
+            )[0]
+            if reduction and eval > alpha:
+                context.reduction_researches += 1
+                eval = -minimax(
+                    position, depth - 1, -alpha - 1, -alpha, opponent_color, player_color, context, ply + 1
+                )[0]
+            if alpha < eval < beta:
+                eval = -minimax(
+                    position, depth - 1, -beta, -eval, opponent_color, player_color, context, ply + 1
+                )[0]
+        position.undo_move(move, player_color)
+
+        if eval > max_eval:
+            max_eval = eval
+            best_move = move
+        alpha = max(alpha, max_eval)
+        if beta <= alpha:
+            context.add_cutoff(move, player_color, depth, ply)
+            break
+
+    # if no move is possible return -100
+    if best_move is None:
+        return -100, None
+
+    if table is not None:
+        if max_eval <= original_alpha:
+            bound = UPPER_BOUND
+        elif max_eval >= beta:
+            bound = LOWER_BOUND
+        else:
+            bound = EXACT
+        table.store(key, depth, bound, max_eval, transform_move(position, best_move, transform))
+
+    return max_eval, best_move
+
+
+def batched_frontier(
+    position: Position,
+    player_color: int,
+    moves: Iterable[Move],
+    frontier: dict[Move, int],
+) -> Iterator[Move]:
+    """
+    Passes on the moves of a node one ply above the leaves, and when the late moves are reached
+    evaluates all of them in one batch with frontier_scores, which is faster than evaluating them one by one.
+    The first moves are most likely to cause a cutoff, so they are searched without generating the others.
+    :param position: actual board state
+    :param player_color: color id of player who's turn it is
+    :param moves: the moves of the node in the order they are searched
+    :param frontier: gets the score for the player of each late move after which the position is quiet,
+                     the other late moves have to be searched
+    :return: iterator over the moves
+    """
+    moves = iter(moves)
+    for index, move in enumerate(moves):
+        yield move
+        if index + 1 == LATE_MOVES:
+            break
+    late_moves = list(moves)
+    if not late_moves:
+        return
+    scores, quiet = frontier_scores(position, late_moves, player_color)
+    for move, score, is_quiet in zip(late_moves, scores.tolist(), quiet.tolist()):
+        if is_quiet:
+            frontier[move] = score
+    yield from late_moves
 
-    # player tries to minimize the score
-    else:
-        minEval = +sys.maxsize
-        for move in possible_moves_list:
 
-            # player won, directly return very high score
-            player_won, _ = check_winning(move, player_color)
-            if player_won:
-                return +1000, move
+def blocking_moves(position: Position, player_color: int, threats: int) -> list[Move]:
+    """
+    The moves which may stop the opponent from completing a road on one of the threatened cells:
+    the moves which put stones on the cells or on the road of the opponent,
+    and stack moves which take stones of the opponent from the top of a stack
+    :param position: actual board state
+    :param player_color: color id of player who's turn it is
+    :param threats: bitmask of the cells on which the opponent can complete a road
+    :return: the moves, the placements on the threatened cells first
+    """
+    opponent_road = position.flats[1 - player_color]
+    targets = threats | opponent_road
+    moves = []
+    for cell in (*cells_of(threats), *cells_of(opponent_road)):
+        if position.reserves[player_color * 2]:
+            moves.append(Move(cell, False))
+        if position.reserves[player_color * 2 + 1]:
+            moves.append(Move(cell, True))
+
+    rays = position.geometry.rays
+    for source in range(len(position.cells)):
+        for move in stack_moves(position, source):
+            if opponent_road >> source & 1 or any(
+                targets >> cell & 1 for cell in rays[source][move.direction][: len(move.drops)]
+            ):
+                moves.append(move)
+    return moves
+
+
+def quiescence(
+    position: Position,
+    alpha: int,
+    beta: int,
+    player_color: int,
+    opponent_color: int,
+    context: SearchContext,
+    depth: int = QUIESCENCE_DEPTH,
+) -> int:
+    """
+    Evaluates a leaf of the search after playing out its road threats: the player wins if it can
+    complete a road, and if the opponent can complete one only the moves which block it are searched,
+    until neither player has a threat or the depth or the node budget of the leaf is used up.
+    :param position: actual board state
+    :param alpha: alpha value for pruning
+    :param beta: beta value for pruning
+    :param player_color: color id of player who's turn it is
+    :param opponent_color: opponents player color id
+    :param context: search context, holds the node budget and the statistics
+    :param depth: moves left to play
+    :return: score for the player
+    """
+    context.visit()
+    context.quiescence_nodes += 1
+
+    # the player completes a road with the next move
+    if road_threats(position, player_color):
+        return WIN_SCORE
 
-            # opponent won directly return very low score
-            opponent_won, _ = check_winning(move, opponent_color)
-            if opponent_won:
-                return -1000, move
+    threats = road_threats(position, opponent_color)
+    if not threats or depth == 0:
+        return scoring(position, player_color, 0, threats)
+    if context.quiescence_nodes >= context.quiescence_limit:
+        context.quiescence_exhausted += 1
+        return scoring(position, player_color, 0, threats)
 
-            eval, _ = minimax(
-                move, depth - 1, alpha, beta, opponent_color, player_color, True
+    # every move which does not block the threat loses
+    max_eval = -WIN_SCORE
+    for move in blocking_moves(position, player_color, threats):
+        position.apply_move(move, player_color)
+        if has_road(position, player_color):
+            eval = WIN_SCORE
+        elif has_road(position, opponent_color):
+            eval = -WIN_SCORE
+        else:
+            eval = -quiescence(
+                position, -beta, -alpha, opponent_color, player_color, context, depth - 1
             )
-            if eval < minEval:
-                minEval = eval
-                best_move = move
-            beta = min(beta, minEval)
-            if beta <= alpha:
-                break
-        return minEval, best_move
+        position.undo_move(move, player_color)
+
+        max_eval = max(max_eval, eval)
+        alpha = max(alpha, max_eval)
+        if beta <= alpha:
+            break
+    return max_eval
+
+
+def find_best_move(
+    position: Position,
+    player_color: int,
+    max_depth: int,
+    soft_time_limit: float,
+    hard_time_limit: float,
+    start_time: Optional[float] = None,
+    context: Optional[SearchContext] = None,
+    first_depth: int = 1,
+) -> tuple[int, Optional[Move], int]:
+    """
+    Searches the best move by iterative deepening with the transposition table of this process.
+    The search depth is increased by one until max_depth is reached or the soft time limit
+    has passed, a search which is still running at the hard time limit is stopped.
+    The first depth is always completed, so there is a move even if the time is up.
+    This is the function the AI runs in its worker process.
+    :param position: actual board state
+    :param player_color: color id of player who's turn it is
+    :param max_depth: maximum search depth
+    :param soft_time_limit: seconds after which no deeper search is started
+    :param hard_time_limit: seconds after which the running search is stopped
+    :param start_time: time.time() when the move was started, defaults to now
+    :param context: context to search with, e.g. with a shared table, which must be
+                    prepared for the new search by the caller, the statistics of the search
+                    (nodes, quiescence, reductions, futility pruning) are counted in it
+    :param first_depth: depth of the first search
+    :return: score for the player and best move of the deepest completed search and its depth
+    """
+    if start_time is None:
+        start_time = time.time()
+    if context is None:
+        context = SearchContext(get_transposition_table())
+        context.table.new_search()
+
+    result = (0, None, 0)
+    for depth in range(first_depth, max_depth + 1):
+        # the score most likely stays close to the one of the last depth,
+        # if it is outside of the window the side it failed on is opened and the depth searched again
+        alpha, beta = -sys.maxsize, sys.maxsize
+        if result[1] is not None:
+            alpha, beta = result[0] - ASPIRATION_WINDOW, result[0] + ASPIRATION_WINDOW
+        try:
+            while True:
+                # a stopped search leaves its moves on the position, so it runs on a copy
+                score, move = minimax(
+                    position.copy(),
+                    depth,
+                    alpha,
+                    beta,
+                    player_color,
+                    1 - player_color,
+                    context,
+                )
+                if score <= alpha:
+                    alpha = -sys.maxsize
+                elif score >= beta:
+                    beta = sys.maxsize
+                else:
+                    break
+        except SearchTimeout:
+            break
+        result = (score, move, depth)
+
+        # a forced win or loss does not change with a deeper search
+        if abs(score) >= WIN_SCORE or time.time() - start_time >= soft_time_limit:
+            break
+        context.deadline = start_time + hard_time_limit
+
+    return result
@@ -0,0 +1,151 @@
+from typing import Callable, Iterator, Optional
+from ..classes.move import Move
+from ..classes.position import Position
+from ..classes.search_context import SearchContext
+from ..functions.possible_moves import is_possible_move, possible_moves
+from ..functions.road_threats import road_completing_cells, road_threats
+from ..functions.utils.helper_functions import cells_of
+
+# priorities of the move groups, from the first tried group to the last one,
+# all other moves are ordered by their history score and then by their static score
+HASH_MOVE = 5 << 40
+ROAD_WIN = 4 << 40
+ROAD_BLOCK = 3 << 40
+KILLER = 2 << 40
+# the history score is placed above the static score, which is below 1 << HISTORY_SHIFT
+HISTORY_SHIFT = 6
+
+
+def static_score(move: Move, central: list[int]) -> int:
+    """
+    Cheap guess how good a move is: flat stones count for roads, standing stones
+    only block, and the closer to the center the more roads a cell can be part of
+    :param move: the move
+    :param central: Geometry.centrality of the board size
+    :return: a score below 1 << HISTORY_SHIFT
+    """
+    centrality = min(central[move.cell], 15)
+    if move.drops:
+        return 16 + centrality
+    if move.is_standing:
+        return centrality
+    return 32 + centrality
+
+
+def move_priority(
+    position: Position,
+    player_color: int,
+    hash_move: Optional[Move],
+    context: SearchContext,
+    ply: int,
+) -> Callable[[Move], int]:
+    """
+    The sort key of the moves of a position, the higher the earlier the move is searched:
+    the best move of an earlier search of the position, placements which complete a road,
+    placements which stop the opponent from completing a road, the killer moves of the ply,
+    the moves with the highest history score and then by static_score.
+    :param position: actual board state
+    :param player_color: color id of player who's turn it is
+    :param hash_move: best move of the position in the transposition table or None
+    :param context: killer moves and history of the search
+    :param ply: distance to the root of the search
+    :return: function from a move to its priority
+    """
+    wins = road_completing_cells(position, player_color)
+    blocks = road_threats(position, 1 - player_color)
+    killers = context.get_killers(ply)
+    history = context.history[player_color]
+    central = position.geometry.centrality
+
+    def priority(move: Move) -> int:
+        if move == hash_move:
+            return HASH_MOVE
+        if not move.drops:
+            if not move.is_standing and wins >> move.cell & 1:
+                return ROAD_WIN
+            if blocks >> move.cell & 1:
+                return ROAD_BLOCK
+        if move == killers[0]:
+            return KILLER + 1
+        if move == killers[1]:
+            return KILLER
+        return (history.get(move, 0) << HISTORY_SHIFT) + static_score(move, central)
+
+    return priority
+
+
+def order_moves(
+    position: Position,
+    moves: list[Move],
+    player_color: int,
+    hash_move: Optional[Move],
+    context: SearchContext,
+    ply: int,
+) -> list[Move]:
+    """
+    Sorts the moves so the ones which most likely cause a cutoff are searched first, see move_priority.
+    :param position: actual board state
+    :param moves: the possible moves
+    :param player_color: color id of player who's turn it is
+    :param hash_move: best move of the position in the transposition table or None
+    :param context: killer moves and history of the search
+    :param ply: distance to the root of the search
+    :return: the sorted moves
+    """
+    priority = move_priority(position, player_color, hash_move, context, ply)
+    return sorted(moves, key=priority, reverse=True)
+
+
+def staged_moves(
+    position: Position,
+    player_color: int,
+    hash_move: Optional[Move],
+    context: SearchContext,
+    ply: int,
+) -> Iterator[Move]:
+    """
+    Yields the possible moves in the order of order_moves, but only generates the moves
+    of the next stage when they are needed, so after a cutoff the others are never generated:
+    1. the hash move, without generating any other move
+    2. the placements which complete a road, then the ones which block a road of the opponent
+    3. the killer moves
+    4. all other moves, sorted by move_priority
+    The position has to be the same every time the next move is taken.
+    :param position: actual board state
+    :param player_color: color id of player who's turn it is
+    :param hash_move: best move of the position in the transposition table or None
+    :param context: killer moves and history of the search
+    :param ply: distance to the root of the search
+    :return: iterator over the possible moves
+    """
+    yielded = []
+
+    # the hash move may come from another position with the same key
+    if hash_move is not None and is_possible_move(position, hash_move, player_color):
+        yield hash_move
+        yielded.append(hash_move)
+
+    flat_stones_left = position.reserves[player_color * 2]
+    standing_stones_left = position.reserves[player_color * 2 + 1]
+    wins = road_completing_cells(position, player_color) if flat_stones_left else 0
+    blocks = road_threats(position, 1 - player_color)
+    threats = [Move(cell, False) for cell in cells_of(wins)]
+    if flat_stones_left:
+        threats += [Move(cell, False) for cell in cells_of(blocks & ~wins)]
+    if standing_stones_left:
+        threats += [Move(cell, True) for cell in cells_of(blocks)]
+    for move in threats:
+        if move not in yielded:
+            yield move
+            yielded.append(move)
+
+    for killer in context.get_killers(ply):
+        if killer is not None and killer not in yielded and is_possible_move(position, killer, player_color):
+            yield killer
+            yielded.append(killer)
+
+    priority = move_priority(position, player_color, None, context, ply)
+    for move in sorted(possible_moves(position, player_color), key=priority, reverse=True):
+        if move not in yielded:
+            yield move
+
@@ -0,0 +1,173 @@
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from typing import Optional
+from ..classes.move import Move
+from ..classes.position import Position
+from ..classes.search_context import SearchContext, SearchTimeout
+from ..classes.worker_pool import WorkerPool
+from ..functions.check_win import has_road
+from ..functions.minimax import WIN_SCORE, get_transposition_table, minimax
+from ..functions.move_ordering import order_moves
+from ..functions.possible_moves import possible_moves
+from ..functions.symmetry import unique_moves
+
+# alpha bound shared by the workers of a pool, set by WorkerPool when a worker is started
+shared_alpha = None
+
+
+def search_root_move(
+    position: Position,
+    move: Move,
+    depth: int,
+    player_color: int,
+    deadline: Optional[float],
+) -> Optional[int]:
+    """
+    Searches one move at the root of a parallel search in a worker process.
+    The search window starts one below the best score the workers have found so far,
+    so moves scoring as good as the best move get their exact score.
+    :param position: board state before the move
+    :param move: the move to search
+    :param depth: search depth of the root
+    :param player_color: color id of player who's turn it is
+    :param deadline: time.time() at which the search is stopped, None for no limit
+    :return: score of the move, None if the deadline was reached
+    """
+    # moves still waiting for a worker at the deadline are not started
+    if deadline is not None and time.time() > deadline:
+        return None
+
+    opponent_color = 1 - player_color
+    context = SearchContext(get_transposition_table(), deadline)
+    alpha = shared_alpha.value - 1
+
+    position.apply_move(move, player_color)
+    if has_road(position, player_color):
+        score = WIN_SCORE
+    elif has_road(position, opponent_color):
+        score = -WIN_SCORE
+    else:
+        try:
+            score = -minimax(
+                position, depth - 1, -sys.maxsize, -alpha, opponent_color, player_color, context, 1
+            )[0]
+        except SearchTimeout:
+            return None
+
+    # later moves can prune against the new bound
+    with shared_alpha.get_lock():
+        if score > shared_alpha.value:
+            shared_alpha.value = score
+    return score
+
+
+def remaining_time(deadline: Optional[float]) -> Optional[float]:
+    """
+    :return: seconds to wait for the workers, None for no limit
+    """
+    if deadline is None:
+        return None
+    # the workers need a moment to notice the deadline and return
+    return max(deadline - time.time(), 0) + 1.0
+
+
+def search_root_moves(
+    pool: WorkerPool,
+    workers: int,
+    position: Position,
+    moves: list[Move],
+    depth: int,
+    player_color: int,
+    deadline: Optional[float],
+) -> list[Optional[int]]:
+    """
+    Searches root moves in the pool with at most workers moves searched at the same time,
+    the next move is started when a worker is done, in the order of the moves
+    :param pool: the worker processes, may have more workers than the player uses
+    :param workers: number of processes of the player
+    :return: the score of each move, None for the moves which were not searched before the deadline
+    """
+    results: list[Optional[int]] = [None] * len(moves)
+    running: dict[Future, int] = {}
+    next_index = 0
+    while next_index < len(moves) or running:
+        while next_index < len(moves) and len(running) < workers:
+            future = pool.submit(search_root_move, position, moves[next_index], depth, player_color, deadline)
+            running[future] = next_index
+            next_index += 1
+        done = wait(running, timeout=remaining_time(deadline), return_when=FIRST_COMPLETED)[0]
+        for future in done:
+            results[running.pop(future)] = future.result()
+        # a move without a score was stopped by the deadline
+        if not done or any(future.result() is None for future in done):
+            break
+
+    # a stopped worker must not change the bound of the next search
+    for future in running:
+        future.cancel()
+    wait(running)
+    return results
+
+
+def find_best_move_parallel(
+    pool: WorkerPool,
+    position: Position,
+    player_color: int,
+    max_depth: int,
+    soft_time_limit: float,
+    hard_time_limit: float,
+    start_time: Optional[float] = None,
+    workers: Optional[int] = None,
+) -> tuple[int, Optional[Move], int]:
+    """
+    Searches the best move by iterative deepening with the root moves split across the workers.
+    On every depth the best move of the last depth is searched first to get a good alpha bound,
+    then all other moves are searched in parallel against the shared bound.
+    The best score wins, between equal scores the move searched first wins,
+    so the result does not depend on the order in which the workers finish.
+    :param pool: the worker processes
+    :param position: actual board state
+    :param player_color: color id of player who's turn it is
+    :param max_depth: maximum search depth
+    :param soft_time_limit: seconds after which no deeper search is started
+    :param hard_time_limit: seconds after which the running search is stopped
+    :param start_time: time.time() when the move was started, defaults to now
+    :param workers: number of moves searched at the same time, None for all workers of the pool
+    :return: score for the player and best move of the deepest completed search and its depth
+    """
+    if start_time is None:
+        start_time = time.time()
+    workers = pool.workers if workers is None else min(workers, pool.workers)
+    hard_deadline = start_time + hard_time_limit
+
+    moves = list(unique_moves(position, possible_moves(position, player_color)))
+    if len(moves) == 0:
+        return -100, None, 0
+    moves = order_moves(position, moves, player_color, None, SearchContext(), 0)
+
+    result = (0, None, 0)
+    for depth in range(1, max_depth + 1):
+        # the first depth is always completed, so there is a move even if the time is up
+        deadline = None if depth == 1 else hard_deadline
+        pool.shared_alpha.value = -sys.maxsize
+
+        results = search_root_moves(pool, 1, position, moves[:1], depth, player_color, deadline)
+        if results[0] is not None:
+            results += search_root_moves(pool, workers, position, moves[1:], depth, player_color, deadline)
+        if None in results:
+            break
+
+        best_index = 0
+        for index, score in enumerate(results):
+            if score > results[best_index]:
+                best_index = index
+        score = results[best_index]
+        result = (score, moves[best_index], depth)
+
+        # a forced win or loss does not change with a deeper search
+        if abs(score) >= WIN_SCORE or time.time() - start_time >= soft_time_limit:
+            break
+        moves.insert(0, moves.pop(best_index))
+
+    return result
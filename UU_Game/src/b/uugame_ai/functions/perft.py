@@ -0,0 +1,65 @@
+from ..classes.move import Move
+from ..classes.position import Position
+from ..functions.check_win import has_road
+from ..functions.possible_moves import possible_moves
+
+
+def perft(position: Position, player_color: int, depth: int) -> int:
+    """
+    Counts the positions at the end of all move sequences of a given length (performance test),
+    to check the move generator against known counts and to measure its speed.
+    A road ends the game, so a position with a road before the last move has no positions after it,
+    like search treats it. The positions after the last move are only counted, not made.
+    :param position: actual board state, unchanged when the function returns
+    :param player_color: color id of player who's turn it is
+    :param depth: number of moves of the sequences
+    :return: the number of positions
+    """
+    if depth == 0:
+        return 1
+    moves = possible_moves(position, player_color)
+    if depth == 1:
+        return len(moves)
+
+    nodes = 0
+    for move in moves:
+        position.apply_move(move, player_color)
+        if not (has_road(position, player_color) or has_road(position, 1 - player_color)):
+            nodes += perft(position, 1 - player_color, depth - 1)
+        position.undo_move(move, player_color)
+    return nodes
+
+
+def divide(position: Position, player_color: int, depth: int) -> list[tuple[Move, int]]:
+    """
+    Splits perft by the first move, to find the move under which two move generators differ
+    :return: the perft count after each possible move, in the order of possible_moves
+    """
+    counts = []
+    for move in possible_moves(position, player_color):
+        position.apply_move(move, player_color)
+        if depth == 1:
+            counts.append((move, 1))
+        elif has_road(position, player_color) or has_road(position, 1 - player_color):
+            counts.append((move, 0))
+        else:
+            counts.append((move, perft(position, 1 - player_color, depth - 1)))
+        position.undo_move(move, player_color)
+    return counts
+
+
+def perft_positions(position: Position, player_color: int, depth: int) -> list[tuple[Position, int]]:
+    """
+    Collects the positions perft passes through, the ones after the last move excluded,
+    to check other functions on the same positions
+    :return: copies of the positions and the color id of the player to move on each
+    """
+    positions = [(position.copy(), player_color)]
+    if depth <= 1:
+        return positions
+    for move in possible_moves(position, player_color):
+        position.apply_move(move, player_color)
+        if not (has_road(position, player_color) or has_road(position, 1 - player_color)):
+            positions += perft_positions(position, 1 - player_color, depth - 1)
+        position.undo_move(move, player_color)
+    return positions
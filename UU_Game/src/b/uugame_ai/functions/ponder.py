@@ -0,0 +1,63 @@
+import time
+from typing import Optional
+from ..classes.move import Move
+from ..classes.position import Position
+from ..classes.search_context import SearchContext
+from ..functions.check_win import has_road
+from ..functions.minimax import find_best_move, get_transposition_table
+from ..functions.smp_search import get_shared_table
+
+# stop flags of the pool by color id, set by WorkerPool when a worker is started
+ponder_stop = None
+
+# depth of the search which predicts the reply of the opponent, the position was searched
+# before for the own move, so the transposition table mostly already holds the answer
+PREDICTION_DEPTH = 2
+
+
+def ponder_search(
+    position: Position,
+    player_color: int,
+    max_depth: int,
+    time_limit: float,
+    table_name: Optional[str] = None,
+    table_size_bits: int = 0,
+) -> Optional[tuple[Position, int, float, tuple[int, Optional[Move], int]]]:
+    """
+    Runs in a worker while the opponent thinks about its move:
+    predicts the reply of the opponent and searches the answer to it until the pool
+    stops pondering, which also fills the transposition table the next search reads:
+    the one of the worker, or the shared table of the pool for a Lazy SMP search.
+    :param position: board state after the own move, the opponent is to move
+    :param player_color: color id of the player who pondered, not the opponent
+    :param max_depth: maximum search depth
+    :param time_limit: seconds after which the search is stopped if the pool did not stop it
+    :param table_name: name of the shared table of the pool, None to search with the table of the worker
+    :param table_size_bits: size of the shared table
+    :return: the predicted board state, the color id of the player to move on it,
+             the seconds it was searched and the result of find_best_move for it,
+             None if no reply was predicted
+    """
+    opponent_color = 1 - player_color
+    if table_name is None:
+        table = get_transposition_table()
+    else:
+        table = get_shared_table(table_name, table_size_bits)
+    table.new_search()
+    stop = lambda: bool(ponder_stop[player_color])
+    _, reply, _ = find_best_move(
+        position, opponent_color, PREDICTION_DEPTH, time_limit, time_limit, context=SearchContext(table, stop=stop)
+    )
+    if reply is None:
+        return None
+    position.apply_move(reply, opponent_color)
+    if has_road(position, opponent_color) or has_road(position, player_color):
+        return None
+
+    start_time = time.time()
+    table.new_search()
+    context = SearchContext(table, stop=stop)
+    result = find_best_move(
+        position, player_color, max_depth, time_limit, time_limit, start_time, context
+    )
+    return position, player_color, time.time() - start_time, result
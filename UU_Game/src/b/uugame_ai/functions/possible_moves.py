@@ -1,243 +1,107 @@
-from ..classes.board import Board
-from ..classes.color import Color
-from ..classes.stone import Stone
-import random
-import copy
+from ..classes.drop_tables import get_drop_tables
+from ..classes.move import Move
+from ..classes.position import Position, HEIGHT_MASK
 
 
-def can_stone_be_placed_on_cell(cell: list[Stone]) -> bool:
+def placement_moves(position: Position, player_color: int) -> list[Move]:
     """
-    Check whether a stone can be placed on a cell.
-    :param stone: the stone to place
-    :param cell: the cell to place the stone on
-    :return: True if the stone can be placed, False otherwise
+    Get all moves which place a stone from the box, the flat stones first.
+    :param position: the board to get the possible moves for
+    :param player_color: the color id of the player who's turn it is
+    :return: a list of the placements
     """
 
-    return len(cell) == 0 or cell[-1].is_standing == False
+    possible_placing_flat_moves = []
+    possible_placing_standing_moves = []
+
+    flat_stones_left = position.reserves[player_color * 2]
+    standing_stones_left = position.reserves[player_color * 2 + 1]
+
+    # place a stone on the board where no standing stone is present
+    # the new stone can be placed either standing or lying
+    for index in range(len(position.cells)):
+        if position.can_place(index):
+            if flat_stones_left > 0:
+                possible_placing_flat_moves.append(Move(index, False))
+            if standing_stones_left > 0:
+                possible_placing_standing_moves.append(Move(index, True))
 
+    return possible_placing_flat_moves + possible_placing_standing_moves
 
-def analyze_adjacent_cell(
-    tmp_board: Board,
-    x: int,
-    y: int,
-    x_before: int,
-    y_before: int,
-    player_color: Color,
-    stack: list[Stone],
-) -> list[Board]:
+
+def stack_moves(position: Position, source: int) -> list[Move]:
     """
-    Analyze an adjacent cell and check if the stack can be placed on it.
-    :param board: the board to get the possible moves for
-    :param x: the x coordinate of the stack
-    :param y: the y coordinate of the stack
-    :param x_before: the x coordinate from the recursion before, prevents moving stack back
-    :param y_before: the y coordinate from the recursion before, prevents moving stack back
-    :param player_color: the color of the player
-    :return: a list of all possible moves
+    Get all moves of the stack on a cell.
+    For each cell moved a stone has to be dropped,
+    the bottom stone of a stack can not be picked up.
+    The moves only depend on how many stones can be picked up and how many cells
+    the stack can walk over before a standing stone or the border,
+    so they are looked up in the drop tables of the board size.
+    :param position: the board to get the possible moves for
+    :param source: the cell of the stack
+    :return: a list of the moves of the stack
     """
 
-    cell_list = tmp_board.get_cell(x, y)
-    if not can_stone_be_placed_on_cell(cell_list):
+    max_from_stack = min(position.carry_limit, (position.cells[source] & HEIGHT_MASK) - 1)
+    if max_from_stack < 1:
         return []
 
-    possible_moves = []
-    copied_stack = copy.deepcopy(stack)
-
-    # place the stack as is on the adjacent cell
-    move = tmp_board.copy()
-    move.get_cell(x, y).extend(copied_stack)
-    possible_moves.append(move)
-
-    if len(copied_stack) > 1:
-        # check for options to split the stack and continuing the move
-        tmp_board.get_cell(x, y).append(copied_stack.pop(0))
-        possible_moves += possible_moves_for_stack(
-            tmp_board, x, y, x_before, y_before, player_color, copied_stack
-        )
-
-    return possible_moves
-
-
-def check_adjacent_cells(
-    tmp_board: Board,
-    x: int,
-    y: int,
-    x_before: int,
-    y_before: int,
-    player_color: Color,
-    stack: list[Stone],
-    forbid_walk_back: bool,
-) -> list[Board]:
+    # the number of cells before the first standing stone in each direction
+    walls = position.walls[0] | position.walls[1]
+    reaches = []
+    for ray in position.geometry.rays[source]:
+        reach = 0
+        while reach < len(ray) and not walls >> ray[reach] & 1:
+            reach += 1
+        reaches.append(reach)
+
+    geometry = position.geometry
+    moves = get_drop_tables(geometry.size_x, geometry.size_y, position.carry_limit).moves[source]
+    possible_moving_moves = []
+    for count in range(1, max_from_stack + 1):
+        for direction, reach in enumerate(reaches):
+            possible_moving_moves += moves[direction][count][reach]
+
+    return possible_moving_moves
+
+
+def is_possible_move(position: Position, move: Move, player_color: int) -> bool:
     """
-    Get all possible moves for a stack on the board.
-    :param board: the board to get the possible moves for
-    :param x: the x coordinate of the stack
-    :param y: the y coordinate of the stack
-    :param x_before: the x coordinate from the recursion before, prevents moving stack back
-    :param y_before: the y coordinate from the recursion before, prevents moving stack back
-    :return: a list of all possible moves
+    Check whether a move which was found on another board can be played on this one,
+    without generating the moves of the board.
+    :param position: the board to check
+    :param move: the move to check
+    :param player_color: the color id of the player who's turn it is
+    :return: True if the move is one of the possible moves
     """
 
-    possible_moves = []
-
-    if (x > 0) and ((x - 1) != x_before):
-        possible_moves += analyze_adjacent_cell(
-            tmp_board.copy(),
-            x - 1,
-            y,
-            x if forbid_walk_back else -1,
-            y if forbid_walk_back else -1,
-            player_color,
-            stack,
-        )
-
-    if (x < 4) and ((x + 1) != x_before):
-        possible_moves += analyze_adjacent_cell(
-            tmp_board.copy(),
-            x + 1,
-            y,
-            x if forbid_walk_back else -1,
-            y if forbid_walk_back else -1,
-            player_color,
-            stack,
-        )
-
-    if (y > 0) and ((y - 1) != y_before):
-        possible_moves += analyze_adjacent_cell(
-            tmp_board.copy(),
-            x,
-            y - 1,
-            x if forbid_walk_back else -1,
-            y if forbid_walk_back else -1,
-            player_color,
-            stack,
-        )
-
-    if (y < 4) and ((y + 1) != y_before):
-        possible_moves += analyze_adjacent_cell(
-            tmp_board.copy(),
-            x,
-            y + 1,
-            x if forbid_walk_back else -1,
-            y if forbid_walk_back else -1,
-            player_color,
-            stack,
-        )
-
-    return possible_moves
-
-
-def possible_moves_for_stack(
-    board,
-    x,
-    y,
-    x_before,
-    y_before,
-    player_color,
-    stack,
-    replace_cell_stack=False,
-    forbid_walk_back=False,
-):
-    possible_moves = []
-
-    # iterate over all stones and check if they can be placed on the cell
-    max_from_stack = min(5, len(stack)-1)
-    for z in range(max_from_stack):
-        z = len(stack) - z + 1
-        # place the lower stack on the current cell
-        # and continue with the upper stack into another recursion level
-        lower_stack, upper_stack = stack[:z], stack[z:]
-
-        tmp_board = copy.deepcopy(board)
-
-        # When the function is called initially the stack is equal to the cell stack
-        # Hence we want to replace the cell stack with the lower stack
-        # Afterwards we and to add the stones because they are currently not placed on the board
-        if replace_cell_stack:
-            tmp_board.set_cell(x, y, lower_stack)
-        else:
-            tmp_board.get_cell(x, y).extend(lower_stack)
-
-        possible_moves += check_adjacent_cells(
-            tmp_board,
-            x,
-            y,
-            x_before,
-            y_before,
-            player_color,
-            upper_stack,
-            forbid_walk_back,
-        )
-
-    return possible_moves
-
-
-def possible_moves(board: Board, flat_stones_left: int, standing_stones_left: int, player_color: Color) -> list[Board]:
+    if move.cell >= len(position.cells):
+        return False
+    if not move.drops:
+        return position.can_place(move.cell) and position.reserves[player_color * 2 + move.is_standing] > 0
+
+    count = sum(move.drops)
+    ray = position.geometry.rays[move.cell][move.direction]
+    return (
+        count <= position.carry_limit
+        and count < position.height(move.cell)
+        and len(move.drops) <= len(ray)
+        and all(position.can_place(index) for index in ray[: len(move.drops)])
+    )
+
+
+def possible_moves(position: Position, player_color: int) -> list[Move]:
     """
     Get all possible moves for the current board.
-    :param board: the board to get the possible moves for
+    :param position: the board to get the possible moves for
+    :param player_color: the color id of the player who's turn it is
     :return: a list of all possible moves
     """
 
+    # 1. move a stone/stack on the board to a new position
     possible_moving_moves = []
-    possible_placing_flat_moves = []
-    possible_placing_standing_moves = []
-
-    # select n cells randomly to get generate possible moves for them
-    # and prevent duplicates
-    selected_cells = []
-    # for i in range(4):
-    #     x = random.randint(0, 3)
-    #     y = random.randint(0, 3)
-    #     selected_cells.append((x, y))
-
-    for i in range(board.size.x):
-        for j in range(board.size.y):
-            selected_cells.append((i, j))
-
-    # 1. place a stone on the board where no standing stone is present
-    # the new stone can be placed either standing or lying
-    
-    flat_stone = Stone(player_color, False)
-    standing_stone = Stone(player_color, True)
-
-    for coords in selected_cells:
-        cell_list = board.get_cell(coords[0], coords[1])
-        if can_stone_be_placed_on_cell(cell_list):
-            if flat_stones_left > 0:
-                possible_placing_flat_moves.append(copy.deepcopy(board))
-                possible_placing_flat_moves[-1].get_cell(coords[0], coords[1]).append(
-                    flat_stone
-                )
-            if standing_stones_left > 0:
-                possible_placing_standing_moves.append(copy.deepcopy(board))
-                possible_placing_standing_moves[-1].get_cell(
-                    coords[0], coords[1]
-                ).append(standing_stone)
-
-    # 2. move a stone/stack on the board to a new position
-    # for each cell moved a stone has to be dropped
-    for coords in selected_cells:
-        cell_list = board.get_cell(coords[0], coords[1])
-        possible_moving_moves += possible_moves_for_stack(
-            board,
-            coords[0],
-            coords[1],
-            -1,  # an origin that does not exists for the first stack move
-            -1,
-            player_color,
-            cell_list,
-            replace_cell_stack=True,
-            forbid_walk_back=False,
-        )
-
-    possible_moves_single = (
-        possible_moving_moves
-        + possible_placing_flat_moves
-        + possible_placing_standing_moves
-    )
-    # possible_moves_double = (
-    #     possible_moves_single + possible_moving_moves + possible_placing_flat_moves
-    # )
+    for index in range(len(position.cells)):
+        possible_moving_moves += stack_moves(position, index)
 
-    return possible_moves_single
+    # 2. place a stone on the board
+    return possible_moving_moves + placement_moves(position, player_color)
@@ -0,0 +1,57 @@
+from ..classes.position import Position, COLOR_SHIFT, HEIGHT_MASK
+from ..functions.utils.helper_functions import cells_of
+
+
+def road_completing_cells(position: Position, color: int) -> int:
+    """
+    Finds the cells on which a flat stone of a color would complete a road of that color
+    :param position: actual board state
+    :param color: the color id of the road
+    :return: bitmask of the cells, only cells a stone can be placed on
+    """
+    geometry = position.geometry
+    road = position.flats[color]
+    open_cells = geometry.full & ~(position.walls[0] | position.walls[1]) & ~road
+
+    cells = 0
+    for start_side, end_side in geometry.road_sides:
+        # a cell completes a road if it touches both parts which are connected to the sides
+        from_start = geometry.spread(geometry.flood(start_side, road)) | start_side
+        from_end = geometry.spread(geometry.flood(end_side, road)) | end_side
+        cells |= from_start & from_end
+    return cells & open_cells
+
+
+def road_threats(position: Position, color: int) -> int:
+    """
+    Finds the cells on which a color can complete a road with its next move,
+    by placing a flat stone or by moving the top stones of a neighboring stack of its road onto it.
+    Longer stack moves which complete a road are not found.
+    :param position: actual board state
+    :param color: the color id of the road
+    :return: bitmask of the cells
+    """
+    cells = road_completing_cells(position, color)
+    if not cells or position.reserves[color * 2]:
+        return cells
+
+    # without flat stones left a cell can only be covered by a stack of the road,
+    # which has to keep a stone of the color on top or the road has to go around it
+    geometry = position.geometry
+    road = position.flats[color]
+    threats = 0
+    for source in cells_of(road & geometry.spread(cells)):
+        targets = cells & geometry.neighbor_masks[source] & ~threats
+        stack = position.cells[source]
+        height = stack & HEIGHT_MASK
+        if not targets or height < 2:
+            continue
+        for count in range(1, min(position.carry_limit, height - 1) + 1):
+            if (stack >> (COLOR_SHIFT + height - count - 1)) & 1 == color:
+                threats |= targets
+                break
+        else:
+            for target in cells_of(targets):
+                if geometry.connects_sides((road & ~(1 << source)) | (1 << target)):
+                    threats |= 1 << target
+    return threats
@@ -1,30 +1,34 @@
-from collections import defaultdict
-from ..classes.board import Board
-from ..classes.color import Color
-from ..classes.stone import Stone
-from ..functions.check_win import check_winning
-from ..functions.check_win_next_round import check_winning_next_round
+from typing import Optional
+from ..classes.position import Position, STACKED, STANDING_ON_OWN, STANDING_ON_OTHER
+from ..functions.road_threats import road_threats
 
 
-def scoring(board: Board, player_color: Color, stones: dict[tuple[Color, bool], int]) -> int:
+def scoring(
+    position: Position,
+    player_color: int,
+    player_threats: Optional[int] = None,
+    opponent_threats: Optional[int] = None,
+) -> int:
     """
     This function calculates a score for a given board state.
-    :param board: actual board state
-    :param player_color: color of player who's turn it is
-    :param stones: dict with stones left for both players
+    :param position: actual board state
+    :param player_color: color id of player who's turn it is
+    :param player_threats: road_threats of the player if they are already known
+    :param opponent_threats: road_threats of the opponent if they are already known
     :return: score of board state
     """
     # initalize score
     score = 0
 
-    opponent_color = Color.BLACK if player_color == Color.WHITE else Color.WHITE
+    opponent_color = 1 - player_color
+    flat_stones_left = position.reserves[player_color * 2]
 
-    win_next_move_player, _, _ = check_winning_next_round(
-        board, player_color, stones[(player_color, False)]
-    )
-    win_next_move_opponent, _, _ = check_winning_next_round(
-        board, opponent_color, stones[(player_color, False)]
-    )
+    win_next_move_player = player_threats
+    if win_next_move_player is None:
+        win_next_move_player = road_threats(position, player_color)
+    win_next_move_opponent = opponent_threats
+    if win_next_move_opponent is None:
+        win_next_move_opponent = road_threats(position, opponent_color)
 
     # +500 for chance to win with next move
     if win_next_move_player:
@@ -41,7 +45,7 @@ def scoring(board: Board, player_color: Color, stones: dict[tuple[Color, bool],
     # zero for 1 and 5 stones left
     # best if 3 stones left
     # -25 otherwise
-    total_own_stones = stones[(player_color, False)] + stones[(player_color, False)]
+    total_own_stones = flat_stones_left + flat_stones_left
     score += max(-5 * (total_own_stones - 3) ** 2 + 20, -25)
 
     if total_own_stones == 14:
@@ -57,38 +61,14 @@ def scoring(board: Board, player_color: Color, stones: dict[tuple[Color, bool],
     # penelize if standing stone on own flat
     # reward for having stones of own color directly stacked on each other
     # penelize to many standing stones, above three standing stones
-    player_stones_on_top = 0
-    opponent_stones_on_top = 0
-    standing_on_own = 0
-    own_color_stacked = 0
-    amount_standing = 0
-    standing_on_other = 0
-
-    for x in range(board.size.x):
-        for y in range(board.size.y):
-            cell = board.get_cell(x, y)
-            if len(cell) > 0:
-                own_color_before = False
-                some_stone_before = False
-                for stone in cell:
-                    if stone.color == player_color:
-                        if own_color_before and not stone.is_standing:
-                            own_color_stacked += 1
-                        if stone.is_standing:
-                            amount_standing += 1
-                            if own_color_before:
-                                standing_on_own += 1
-                            elif some_stone_before:
-                                standing_on_other += 1
-                        own_color_before = True
-                    else:
-                        own_color_before = False
-                        some_stone_before = True
-                if not cell[-1].is_standing:
-                    if cell[-1].color == player_color:
-                        player_stones_on_top += 1
-                    else:
-                        opponent_stones_on_top += 1
+    # the counters are kept up to date by the position with every move
+    player_stones_on_top = position.flats[player_color].bit_count()
+    opponent_stones_on_top = position.flats[opponent_color].bit_count()
+    features = position.features[player_color * 3 : player_color * 3 + 3]
+    standing_on_own = features[STANDING_ON_OWN]
+    own_color_stacked = features[STACKED]
+    amount_standing = position.walls[player_color].bit_count()
+    standing_on_other = features[STANDING_ON_OTHER]
 
     # ratio of stones on top
     score += (player_stones_on_top - opponent_stones_on_top) * 3
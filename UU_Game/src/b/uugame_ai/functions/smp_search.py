@@ -0,0 +1,118 @@
+import atexit
+import time
+from typing import Optional
+from concurrent.futures import TimeoutError
+from ..classes.move import Move
+from ..classes.position import Position
+from ..classes.search_context import SearchContext
+from ..classes.shared_transposition_table import SharedTranspositionTable
+from ..classes.worker_pool import WorkerPool
+from ..functions.minimax import find_best_move
+
+# shared tables this worker process is attached to, by the name of the shared memory
+attached_tables: dict[str, SharedTranspositionTable] = {}
+
+
+def get_shared_table(name: str, size_bits: int) -> SharedTranspositionTable:
+    """
+    Attaches the worker process to a shared table, only once per table
+    """
+    table = attached_tables.get(name)
+    if table is None:
+        table = SharedTranspositionTable(size_bits, name)
+        attached_tables[name] = table
+        atexit.register(table.close)
+    return table
+
+
+def lazy_smp_worker(
+    position: Position,
+    player_color: int,
+    worker_index: int,
+    max_depth: int,
+    soft_time_limit: float,
+    hard_time_limit: float,
+    start_time: float,
+    table_name: str,
+    table_size_bits: int,
+) -> tuple[int, Optional[Move], int]:
+    """
+    Searches the position by iterative deepening in one worker of a Lazy SMP search.
+    Every other worker starts one depth deeper, so the workers are spread over two depths
+    and fill the shared table for each other.
+    The search stops at the time limits or when the shared table is told to stop.
+    :return: score for the player and best move of the deepest completed search and its depth
+    """
+    table = get_shared_table(table_name, table_size_bits)
+    context = SearchContext(table, stop=table.is_stopped)
+    return find_best_move(
+        position,
+        player_color,
+        max_depth,
+        soft_time_limit,
+        hard_time_limit,
+        start_time,
+        context,
+        1 + worker_index % 2,
+    )
+
+
+def find_best_move_smp(
+    pool: WorkerPool,
+    position: Position,
+    player_color: int,
+    max_depth: int,
+    soft_time_limit: float,
+    hard_time_limit: float,
+    start_time: Optional[float] = None,
+    timeout: Optional[float] = None,
+    workers: Optional[int] = None,
+) -> tuple[int, Optional[Move], int]:
+    """
+    Searches the best move with the workers of the pool on the same position (Lazy SMP).
+    The workers only share the transposition table of the pool.
+    When the first worker is done the others are stopped, and the deepest completed search
+    of all workers is the result, the first worker wins between equal depths.
+    :param pool: the worker processes
+    :param position: actual board state
+    :param player_color: color id of player who's turn it is
+    :param max_depth: maximum search depth
+    :param soft_time_limit: seconds after which no deeper search is started
+    :param hard_time_limit: seconds after which the running search is stopped
+    :param start_time: time.time() when the move was started, defaults to now
+    :param timeout: seconds to wait for the first worker, None for no limit
+    :param workers: number of workers which search, None for all workers of the pool
+    :return: score for the player and best move of the deepest completed search and its depth
+    """
+    if start_time is None:
+        start_time = time.time()
+    workers = pool.workers if workers is None else min(workers, pool.workers)
+    table = pool.get_shared_table()
+    table.new_search()
+
+    futures = [
+        pool.submit(
+            lazy_smp_worker,
+            position,
+            player_color,
+            worker_index,
+            max_depth,
+            soft_time_limit,
+            hard_time_limit,
+            start_time,
+            table.name,
+            table.size_bits,
+        )
+        for worker_index in range(workers)
+    ]
+    try:
+        result = futures[0].result(timeout=timeout)
+    except TimeoutError:
+        result = (0, None, 0)
+    table.stop()
+
+    for future in futures[1:]:
+        helper_result = future.result()
+        if helper_result[2] > result[2]:
+            result = helper_result
+    return result
@@ -0,0 +1,93 @@
+from typing import Iterable, Iterator, Optional
+from ..classes.move import Move
+from ..classes.position import Position
+
+# Positions with at most this many occupied cells are looked up by the key of their
+# symmetry class. Later in the game positions are hardly ever symmetric,
+# and computing the keys of all symmetric positions costs more than it finds.
+SYMMETRY_CELLS = 8
+
+
+def transform_move(position: Position, move: Optional[Move], transform: int) -> Optional[Move]:
+    """
+    Maps a move onto the transformed board
+    :param position: the board of the move
+    :param move: the move or None
+    :param transform: index into Geometry.cell_maps
+    :return: the same move on the transformed board, None for None
+    """
+    if move is None or transform == 0:
+        return move
+    geometry = position.geometry
+    if not move.drops:
+        return Move(geometry.cell_maps[transform][move.cell], move.is_standing)
+    return Move(
+        geometry.cell_maps[transform][move.cell],
+        False,
+        geometry.direction_maps[transform][move.direction],
+        move.drops,
+    )
+
+
+def occupied_cells(position: Position) -> int:
+    """
+    Bitmask of the cells with at least one stone
+    """
+    return position.flats[0] | position.flats[1] | position.walls[0] | position.walls[1]
+
+
+def symmetric_key(position: Position) -> tuple[int, int]:
+    """
+    Finds the zobrist key of the symmetry class of an early position:
+    the smallest key of all reflections and rotations of the position.
+    Later positions keep their own key, see SYMMETRY_CELLS.
+    :param position: actual board state
+    :return: the key and the transform which maps the position onto the one with that key
+    """
+    occupied = occupied_cells(position)
+    if occupied.bit_count() > SYMMETRY_CELLS:
+        return position.key, 0
+
+    cells = position.cells
+    indices = [index for index in range(len(cells)) if occupied >> index & 1]
+    best_key, best_transform = position.key, 0
+    for transform in range(1, len(position.geometry.cell_maps)):
+        cell_map = position.geometry.cell_maps[transform]
+        key = 0
+        for index in indices:
+            key ^= position.stack_key(cell_map[index], cells[index])
+        if key < best_key:
+            best_key, best_transform = key, transform
+    return best_key, best_transform
+
+
+def unique_moves(position: Position, moves: Iterable[Move]) -> Iterator[Move]:
+    """
+    Drops the moves which are the reflection or rotation of another move on a symmetric position,
+    they lead to the same position up to symmetry and so have the same score.
+    The moves are taken one by one, so they can be generated lazily.
+    :param position: actual board state
+    :param moves: the possible moves
+    :return: iterator over the first move of each group of symmetric moves, in the given order
+    """
+    occupied = occupied_cells(position)
+    symmetries = []
+    if occupied.bit_count() <= SYMMETRY_CELLS:
+        geometry = position.geometry
+        cells = tuple(position.cells)
+        symmetries = [
+            transform
+            for transform in range(1, len(geometry.cell_maps))
+            if geometry.transform_cells[transform](position.cells) == cells
+        ]
+    if not symmetries:
+        yield from moves
+        return
+
+    symmetric = set()
+    for move in moves:
+        if move in symmetric:
+            continue
+        yield move
+        for transform in symmetries:
+            symmetric.add(transform_move(position, move, transform))
@@ -1,27 +1,22 @@
-from ...classes.board import Board
+from typing import Iterator
+from ...classes.position import Position
 
-def get_adjacent(board: Board, x: int, y: int) -> list[tuple[int, int]]:
+def get_adjacent(board: Position, x: int, y: int) -> list[tuple[int, int]]:
     """
     this function gives all coordinates in a list of the horizontal and vertical neighbors
+    the list is shared by all callers and must not be changed
     :param x: the actual x-coordinate
     :param y: the actual y-coordinate
     :return: a list of all neighbors in [x,y] coordinates
     """
-    neighbors = []
-    if x == 0:
-        neighbors.append((1, y))
-    elif x == board.size.x - 1:
-        neighbors.append((board.size.x-2, y))
-    else:
-        neighbors.append((x - 1, y))
-        neighbors.append((x + 1, y))
+    return board.geometry.adjacent[x * board.size.y + y]
 
-    if y == 0:
-        neighbors.append((x, 1))
-    elif y == board.size.y - 1:
-        neighbors.append((x, board.size.y-2))
-    else:
-        neighbors.append((x, y - 1))
-        neighbors.append((x, y + 1))
 
-    return neighbors
+def cells_of(cells: int) -> Iterator[int]:
+    """
+    The indices of the set bits of a bitmask, from the lowest upwards
+    """
+    while cells:
+        lowest = cells & -cells
+        yield lowest.bit_length() - 1
+        cells ^= lowest
@@ -1,40 +1,188 @@
 from collections import defaultdict
 import copy
 from typing import Optional, Union
-import sys
-from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from concurrent.futures import TimeoutError
 import argparse
 from collections import deque
 import random
+import time
 import numpy as np
 
 import uu_game.model.game
 from uu_game.model.stone import Stone as AStone, StonePose
 from uu_game.vec2 import Vec2
-from .classes.stone import Stone
-from .classes.color import Color
-from .classes.board import Board
+from .classes.color import Color, COLOR_ID_TO_COLOR
+from .classes.move import Move
+from .classes.position import Position
 from .classes.mode import Mode
+from .classes.worker_pool import WorkerPool
 from .functions.initial_stone import place_initial_stone
+from .functions.mcts import find_best_move_mcts
 from .functions.validity import is_board_valid
-from .functions.check_win import check_winning
-from .functions.check_win_next_round import check_winning_next_round
-from .functions.possible_moves import possible_moves
-from .functions.minimax import minimax
+from .functions.check_win import check_winning, has_road
+from .functions.possible_moves import possible_moves, stack_moves
+from .functions.road_threats import road_completing_cells, road_threats
+from .functions.scoring import scoring
+from .functions.utils.helper_functions import cells_of
+from .functions.minimax import find_best_move
+from .functions.parallel_search import find_best_move_parallel
+from .functions.ponder import ponder_search
+from .functions.smp_search import find_best_move_smp
 from .functions.top_stone_winner import top_stone_winner
-from uu_game.model.board import Board as ABoard
 
 def print(*args):
     pass
 
-def run_ai(board: Board, turn_number: int, player_color: Color, mode: Mode, game: "uu_game.model.game.Game") -> Optional[tuple[bool, Board]]:
+# time budget of a move in hard mode in seconds:
+# no deeper search is started after the soft limit, the running search is stopped at the hard limit
+HARD_SOFT_TIME_LIMIT = 2.0
+HARD_HARD_TIME_LIMIT = 4.5
+HARD_MAX_DEPTH = 12
+# extra time for the worker process to return its result after the hard limit
+HARD_TIME_GRACE = 1.0
+# longest time the AI searches the predicted reply while the opponent thinks
+PONDER_TIME_LIMIT = 120.0
+# time budget of a move in mcts mode in seconds, and the most playouts of a move, None for no limit
+MCTS_TIME_LIMIT = 3.0
+MCTS_PLAYOUTS = None
+
+def find_tactical_move(board: Position, player_color: int) -> Optional[Move]:
+    """
+    Answers the positions which need no search: if the player can complete a road the move
+    which does it, and if all moves which stop the opponent from completing a road
+    are placements on the same cell the best of them.
+    :param board: actual board state
+    :param player_color: color id of player who's turn it is
+    :return: the move or None if the position has to be searched
+    """
+    opponent_color = 1 - player_color
+
+    # 1. win with a placement, or with a stack move if the road can be completed by one
+    if board.reserves[player_color * 2]:
+        wins = road_completing_cells(board, player_color)
+        if wins:
+            return Move(next(cells_of(wins)), False)
+    if road_threats(board, player_color):
+        for source in range(len(board.cells)):
+            for move in stack_moves(board, source):
+                board.apply_move(move, player_color)
+                player_won = has_road(board, player_color)
+                board.undo_move(move, player_color)
+                if player_won:
+                    return move
+
+    # 2. block the road of the opponent, every other move loses
+    if not road_threats(board, opponent_color):
+        return None
+    blocks = []
+    for move in possible_moves(board, player_color):
+        board.apply_move(move, player_color)
+        # a stack move can complete the own road even though a placement can't
+        if has_road(board, player_color):
+            board.undo_move(move, player_color)
+            return move
+        if not has_road(board, opponent_color) and not road_threats(board, opponent_color):
+            blocks.append((-scoring(board, opponent_color), move))
+        board.undo_move(move, player_color)
+
+    # a flat and a standing stone on the blocked cell are compared by the evaluation,
+    # with other ways to block, or none, the search decides
+    if blocks and all(not move.drops and move.cell == blocks[0][1].cell for _, move in blocks):
+        return max(blocks, key=lambda block: block[0])[1]
+    return None
+
+
+def search_hard_move(
+    pool: WorkerPool,
+    board: Position,
+    player_color: int,
+    soft_time_limit: float,
+    hard_time_limit: float,
+    start_time: float,
+    workers: int = 1,
+    smp: bool = False,
+) -> Optional[Move]:
+    """
+    Searches the best move in the worker processes
+    :param workers: number of processes of the player, the pool may have more
+    :param smp: all workers search the same position with a shared table
+                instead of splitting the root moves
+    :return: the best move or None if the worker did not answer in time
+    """
+    if smp:
+        final_score, final_move, depth = find_best_move_smp(
+            pool,
+            board,
+            player_color,
+            HARD_MAX_DEPTH,
+            soft_time_limit,
+            hard_time_limit,
+            start_time,
+            timeout=hard_time_limit + HARD_TIME_GRACE,
+            workers=workers,
+        )
+        print("score: ", final_score, "depth: ", depth)
+        return final_move
+
+    if workers > 1:
+        final_score, final_move, depth = find_best_move_parallel(
+            pool, board, player_color, HARD_MAX_DEPTH, soft_time_limit, hard_time_limit, start_time, workers
+        )
+        print("score: ", final_score, "depth: ", depth)
+        return final_move
+
+    future = pool.submit(
+        find_best_move,
+        board,
+        player_color,
+        HARD_MAX_DEPTH,
+        soft_time_limit,
+        hard_time_limit,
+        start_time,
+    )
+    try:
+        final_score, final_move, depth = future.result(
+            timeout=hard_time_limit + HARD_TIME_GRACE
+        )
+        print("score: ", final_score, "depth: ", depth)
+        return final_move
+    except TimeoutError:
+        return None
+
+def run_ai(
+    board: Position,
+    turn_number: int,
+    player_color: Color,
+    mode: Mode,
+    game: "uu_game.model.game.Game",
+    soft_time_limit: float = HARD_SOFT_TIME_LIMIT,
+    hard_time_limit: float = HARD_HARD_TIME_LIMIT,
+    pool: Optional[WorkerPool] = None,
+    workers: int = 1,
+    ponder: bool = False,
+) -> Optional[tuple[bool, Position]]:
+    """
+    Lets the AI do one move.
+    :param pool: worker processes of the game session for the search in hard mode,
+                 without a pool the processes are started just for this move
+    :param workers: number of processes the search in hard mode uses,
+                    with more than one the root moves are split across the processes
+    :param ponder: in hard mode search the predicted reply of the opponent in the pool
+                   after the move, if the opponent plays it the next move is answered at once
+    """
+    start_time = time.time()
 
     # if the mode is medium change it with 50/50 prob to easy or hard
     if mode == Mode.MEDIUM:
         mode = random.choice([Mode.EASY, Mode.HARD])
 
-    # define opponent color
-    opponent_color = Color.BLACK if player_color == Color.WHITE else Color.WHITE
+    # define the color ids of the player and the opponent
+    player_color = COLOR_ID_TO_COLOR.index(player_color)
+    opponent_color = 1 - player_color
+
+    # the pondering of the player may have found the move already,
+    # the pondering of the opponent goes on in its own worker
+    pondered = pool.stop_pondering(player_color) if pool is not None else None
 
     # check if board is valid
     # IsBoardValid = is_board_valid(board, player_color)
@@ -49,6 +197,11 @@ def run_ai(board: Board, turn_number: int, player_color: Color, mode: Mode, game
         print(final_move)
         return False, final_move
 
+    # answer forced moves in hard and mcts mode before generating the moves and starting the search
+    tactical_move = None
+    if mode in (Mode.HARD, Mode.HARD_SMP, Mode.MCTS):
+        tactical_move = find_tactical_move(board, player_color)
+
     # check if AI won -> should never happen
     # player_won, path = check_winning(board, player_color)
     # if player_won:
@@ -64,7 +217,7 @@ def run_ai(board: Board, turn_number: int, player_color: Color, mode: Mode, game
     #     return True, board
 
     # calculate all possible moves
-    possible_moves_list = possible_moves(board, game.active_player.stone_counts[StonePose.FLAT], game.active_player.stone_counts[StonePose.STANDING], player_color)
+    possible_moves_list = possible_moves(board, player_color)
     print(f"Possible moves: {len(possible_moves_list)}")
     if len(possible_moves_list) == 0:
         game.set_wants_draw(game.active_player, True)
@@ -89,9 +242,7 @@ def run_ai(board: Board, turn_number: int, player_color: Color, mode: Mode, game
         final_move = random.choice(possible_moves_list)
 
         # check if player could finish the game in this round
-        win_next_player, _, _ = check_winning_next_round(
-            board, player_color, game.active_player.stone_counts[StonePose.FLAT]
-        )
+        win_next_player = road_threats(board, player_color)
         if win_next_player:
             print("Player could win with next move")
             prob_1 = np.random.uniform(0.0, 1.0)
@@ -100,7 +251,9 @@ def run_ai(board: Board, turn_number: int, player_color: Color, mode: Mode, game
                 print("choose winning option")
                 # iterate over all possible moves and find a move that ends the game
                 for move in possible_moves_list:
-                    player_won, path = check_winning(move, player_color)
+                    board.apply_move(move, player_color)
+                    player_won = has_road(board, player_color)
+                    board.undo_move(move, player_color)
                     if player_won:
                         final_move = move
                         break
@@ -108,76 +261,117 @@ def run_ai(board: Board, turn_number: int, player_color: Color, mode: Mode, game
         else:
             # check if the opponent could win in the next round
             # this function checks just "easy" ways to win the game (place stone or move a stack one cell)
-            win_next_opponent, path, foi = check_winning_next_round(
-                board, opponent_color, game.get_opponent().stone_counts[StonePose.FLAT]
-            )
+            win_next_opponent = road_threats(board, opponent_color)
             if win_next_opponent:
                 print("Opponent could win with next move")
-                # print(f"Winning path would be: {path}")
-                # print(f"FOI is {foi}")
                 prob_2 = np.random.uniform(0.0, 1.0)
                 # with a probability of 1/4 the player tries to defend it
                 if prob_2 > 0.75:
                     print("try to defend")
                     # iterate over all possible moves and find a move that prevents the opponent from winning
                     for move in possible_moves_list:
-                        win_next_opponent, _, _ = check_winning_next_round(
-                            move, opponent_color, game.get_opponent().stone_counts[StonePose.FLAT]
-                        )
+                        board.apply_move(move, player_color)
+                        win_next_opponent = road_threats(board, opponent_color)
+                        board.undo_move(move, player_color)
                         if not win_next_opponent:
                             final_move = move
                             break
         print(final_move)
 
-    elif mode == Mode.HARD:
-        with ProcessPoolExecutor(max_workers=1) as executor:
-            future = executor.submit(minimax, board, 3, -sys.maxsize, sys.maxsize, player_color, opponent_color, True)
-            try:
-                final_score, final_move = future.result() # timeout=4.5
-                print("score: ", final_score)
-            except TimeoutError:
-                final_move = random.choice(possible_moves_list)
+    elif tactical_move is not None:
+        final_move = tactical_move
+    elif (
+        mode in (Mode.HARD, Mode.HARD_SMP)
+        and pondered is not None
+        and pondered[0] == board
+        and pondered[1] == player_color
+        and pondered[2] >= soft_time_limit
+        and pondered[3][1] is not None
+    ):
+        # the opponent played the predicted reply and it was searched as long as a move
+        final_move = pondered[3][1]
+        print("pondered score: ", pondered[3][0], "depth: ", pondered[3][2])
+    elif mode in (Mode.HARD, Mode.HARD_SMP):
+        smp = mode == Mode.HARD_SMP
+        if pool is None:
+            with WorkerPool(workers) as move_pool:
+                final_move = search_hard_move(
+                    move_pool, board, player_color, soft_time_limit, hard_time_limit, start_time, workers, smp
+                )
+        else:
+            final_move = search_hard_move(
+                pool, board, player_color, soft_time_limit, hard_time_limit, start_time, workers, smp
+            )
+        if final_move is None:
+            final_move = random.choice(possible_moves_list)
+    elif mode == Mode.MCTS:
+        if pool is None:
+            with WorkerPool(workers) as move_pool:
+                result = find_best_move_mcts(
+                    move_pool, board, player_color, MCTS_TIME_LIMIT, MCTS_PLAYOUTS, start_time,
+                    timeout=MCTS_TIME_LIMIT + HARD_TIME_GRACE,
+                )
+        else:
+            result = find_best_move_mcts(
+                pool, board, player_color, MCTS_TIME_LIMIT, MCTS_PLAYOUTS, start_time,
+                timeout=MCTS_TIME_LIMIT + HARD_TIME_GRACE, workers=workers,
+            )
+        win_rate, final_move, playouts, playouts_per_second = result
+        print("win rate: ", win_rate, "playouts: ", playouts, "playouts/s: ", round(playouts_per_second))
+        if final_move is None:
+            final_move = random.choice(possible_moves_list)
     else:
         final_move = random.choice(possible_moves_list)
 
+    board.apply_move(final_move, player_color)
+
     # check if one of the two players won with this move
-    win_after_move_player, path = check_winning(final_move, player_color)
+    win_after_move_player, path = check_winning(board, player_color)
     if win_after_move_player:
         print(f"The winning path is: {path}")
         print("AI WON")
-        return True, final_move  # return winning condition
+        return True, board  # return winning condition
 
-    win_after_move_oppnent, path = check_winning(final_move, opponent_color)
+    win_after_move_oppnent, path = check_winning(board, opponent_color)
     if win_after_move_oppnent:
         print(f"The winning path is: {path}")
         print("HUMAN WON")
-        return True, final_move
+        return True, board
 
-    # finish move by returning
-    return False, final_move
+    if ponder and pool is not None and mode in (Mode.HARD, Mode.HARD_SMP):
+        # the Lazy SMP search reads the shared table, so the pondering has to fill that one
+        table_name, table_size_bits = None, 0
+        if mode == Mode.HARD_SMP:
+            table = pool.get_shared_table()
+            table_name, table_size_bits = table.name, table.size_bits
+        pool.start_pondering(
+            player_color, ponder_search, board.copy(), player_color, HARD_MAX_DEPTH, PONDER_TIME_LIMIT, table_name, table_size_bits
+        )
 
-COLOR_ID_TO_COLOR = [Color.BLACK, Color.WHITE]
+    # finish move by returning
+    return False, board
 
-def run_ai_compat(game: "uu_game.model.game.Game", mode: Mode) -> bool:
+def run_ai_compat(game: "uu_game.model.game.Game", mode: Mode, pool: Optional[WorkerPool] = None) -> bool:
     game._start_turn()
     old_game_board = copy.deepcopy(game.board)
     counts: defaultdict[AStone, int] = defaultdict(lambda: 0)
-    board = Board(game.board.size)
+    board = Position(game.board.size, game.hand_limit)
     for x in range(game.board.size.x):
         for y in range(game.board.size.y):
-            stones = []
             for stone in game.board[Vec2(x, y)].stones:
-                stones.append(Stone(COLOR_ID_TO_COLOR[stone.color], stone.pose == StonePose.STANDING))
+                board.push(board.index(x, y), stone.color, stone.pose == StonePose.STANDING)
                 counts[stone] -= 1
-            board.set_cell(x, y, stones)
-    result = run_ai(board, game.active_player.turns, COLOR_ID_TO_COLOR[game.active_player.color], mode, game)
+    for player in game.players:
+        board.reserves[player.color * 2] = player.stone_counts[StonePose.FLAT]
+        board.reserves[player.color * 2 + 1] = player.stone_counts[StonePose.STANDING]
+    result = run_ai(board, game.active_player.turns, COLOR_ID_TO_COLOR[game.active_player.color], mode, game, pool=pool, workers=game.active_player.workers, ponder=game.active_player.ponder)
     if result is not None:
         new_board = result[1]
         for x in range(game.board.size.x):
             for y in range(game.board.size.y):
                 stones = deque()
-                for stone in new_board.get_cell(x, y):
-                    stone = AStone(COLOR_ID_TO_COLOR.index(stone.color), StonePose.STANDING if stone.is_standing else StonePose.FLAT)
+                for color, is_standing in new_board.get_stack(new_board.index(x, y)):
+                    stone = AStone(color, StonePose.STANDING if is_standing else StonePose.FLAT)
                     counts[stone] += 1
                     stones.append(stone)
                     game.board[Vec2(x, y)].stones = stones
@@ -15,15 +15,20 @@ from uu_game.curses_wrappers import start_curses, exit_curses
 from uu_game.views.button_view import ButtonView
 from b.uugame_ai.classes.mode import Mode # type: ignore
 from b.uugame_ai.main import run_ai_compat
+from b.uugame_ai.classes.worker_pool import WorkerPool # type: ignore
 from uu_game.views.view import View # type: ignore
 
 
 parser = argparse.ArgumentParser()
-parser.add_argument("--player1", default="human", type=str, choices=["human", "easy", "medium", "hard"])
-parser.add_argument("--player2", default="human", type=str, choices=["human", "easy", "medium", "hard"])
+parser.add_argument("--player1", default="human", type=str, choices=["human", "easy", "medium", "hard", "hard-smp", "mcts"])
+parser.add_argument("--player2", default="human", type=str, choices=["human", "easy", "medium", "hard", "hard-smp", "mcts"])
+parser.add_argument("--player1-workers", default=1, type=int, help="number of processes the AI of player 1 searches with")
+parser.add_argument("--player2-workers", default=1, type=int, help="number of processes the AI of player 2 searches with")
+parser.add_argument("--player1-ponder", action="store_true", help="let the hard AI of player 1 search during the turn of player 2")
+parser.add_argument("--player2-ponder", action="store_true", help="let the hard AI of player 2 search during the turn of player 1")
 parser.add_argument("--first", default="black", type=str, choices=["white", "black"])
 args = parser.parse_args()
-difficulty_map = {"easy": Mode.EASY, "medium": Mode.MEDIUM, "hard": Mode.HARD, "human": None}
+difficulty_map = {"easy": Mode.EASY, "medium": Mode.MEDIUM, "hard": Mode.HARD, "hard-smp": Mode.HARD_SMP, "mcts": Mode.MCTS, "human": None}
 
 class Controller:
     def __init__(self, curses_window: curses.window):
@@ -34,9 +39,16 @@ class Controller:
 
         # Model
         self.game = Game(Vec2(5, 5), 5, [
-            PlayerSpec(color=0 if args.first == "black" else 1, ai=difficulty_map[args.player1]),
-            PlayerSpec(color=1 if args.first == "black" else 0, ai=difficulty_map[args.player2])
+            PlayerSpec(color=0 if args.first == "black" else 1, ai=difficulty_map[args.player1], workers=args.player1_workers, ponder=args.player1_ponder),
+            PlayerSpec(color=1 if args.first == "black" else 0, ai=difficulty_map[args.player2], workers=args.player2_workers, ponder=args.player2_ponder)
         ])
+        # AI worker processes for the whole session, only needed if an AI searches
+        self.ai_pool: Optional[WorkerPool] = None
+        ai_players = [player for player in self.game.players if player.ai in (Mode.MEDIUM, Mode.HARD, Mode.HARD_SMP, Mode.MCTS)]
+        if ai_players:
+            # a player who ponders keeps a worker busy during the turn of the other player
+            ponder_players = [player for player in ai_players if player.ponder]
+            self.ai_pool = WorkerPool(max(player.workers for player in ai_players) + len(ponder_players))
 
         self.views = []
         self.init_views()
@@ -81,6 +93,21 @@ class Controller:
         """
         start_curses(self.curses_window)
         set_background(self.curses_window)
+        try:
+            if self.ai_pool is not None:
+                self.ai_pool.start()
+            self.run_loop()
+        finally:
+            if self.ai_pool is not None:
+                self.ai_pool.shutdown()
+        exit_curses(self.curses_window)
+        if self.ai_pool is not None:
+            print(self.ai_pool)
+
+    def run_loop(self):
+        """
+        Handles user input until the game is quit
+        """
         while True:
             self.render()
             # Wait for user input
@@ -169,7 +196,6 @@ Scroll up to see the full instructions. Press enter to continue.
             self.activate_draw_defeat_button(key)
 
             self.curses_window.refresh()
-        exit_curses(self.curses_window)
 
     def activate_draw_defeat_button(self, key: int):
         def game_actions():
@@ -239,7 +265,7 @@ Scroll up to see the full instructions. Press enter to continue.
             self.curses_window.refresh()
             try:
                 if run_ai_compat is not None and Mode is not None and self.game.active_player.ai is not None:
-                    run_ai_compat(self.game, self.game.active_player.ai)
+                    run_ai_compat(self.game, self.game.active_player.ai, self.ai_pool)
                     if self.game.outcome is None:
                         self.perform_game_actions(lambda: None)
             except ValueError:
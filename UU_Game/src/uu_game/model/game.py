@@ -6,14 +6,20 @@ from .board import Board
 from .stone import Stone, StonePose
 
 class PlayerSpec:
-    def __init__(self, *, color: int, ai: Optional[Mode] = None):
+    def __init__(self, *, color: int, ai: Optional[Mode] = None, workers: int = 1, ponder: bool = False):
         self.color = color
         self.ai = ai
+        # number of processes the AI searches with
+        self.workers = workers
+        # whether the AI searches during the turn of the opponent
+        self.ponder = ponder
 
 class Player:
     def __init__(self, spec: PlayerSpec):
         self.color = spec.color
         self.ai = spec.ai
+        self.workers = spec.workers
+        self.ponder = spec.ponder
         self.turns = 0
         self.active = False
         self.stone_counts: defaultdict[StonePose, int] = defaultdict(lambda: 0)